@@ -4,21 +4,38 @@ Integration tests for AudioControl system
 These tests start the AudioControl server and test the API endpoints
 """
 
+import hashlib
 import json
+import logging
 import os
+import queue
+import re
 import signal
 import subprocess
 import sys
+import threading
 import time
 from pathlib import Path
+from urllib.parse import quote
 from typing import Dict, List, Optional, Any
 import tempfile
 import shutil
 import copy
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
 
 import pytest
 import requests
 import psutil
+import websocket
+
+try:
+    import orjson
+except ImportError:
+    # orjson is optional, fall back to the standard library json module
+    orjson = None
+
+logger = logging.getLogger(__name__)
 
 # Test configuration
 TEST_PORTS = {
@@ -49,10 +66,159 @@ TEST_CONFIGS = {
 # Default path to static configuration file
 STATIC_CONFIG_PATH = Path(__file__).parent / "test_config_generic.json"
 
+# Prerecorded API responses used when running with USE_MOCK_SERVER=1
+MOCKS_DIR = Path(__file__).parent / "fixtures" / "audiocontrol_mocks"
+
 # Global server processes
 _server_processes: Dict[str, subprocess.Popen] = {}
 _server_configs: Dict[str, Path] = {}
 
+# Keep-alive HTTP session shared by all test servers, created on first use
+_http_session: Optional[requests.Session] = None
+# Enough connections for the tests that call the API from several threads at once
+HTTP_POOL_SIZE = 10
+
+def get_http_session() -> requests.Session:
+    """Get the HTTP session shared by all test servers
+    
+    All servers of a test process listen on the same host and port, so one
+    connection pool serves every API call of the whole test session.
+    """
+    global _http_session
+    if _http_session is None:
+        _http_session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL_SIZE)
+        _http_session.mount("http://", adapter)
+    return _http_session
+
+def close_http_session():
+    """Close the shared HTTP session and its pooled connections"""
+    global _http_session
+    if _http_session is not None:
+        _http_session.close()
+        _http_session = None
+
+def dumps_json(payload: Any) -> bytes:
+    """Serialize a request payload to JSON, using orjson if available"""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload).encode()
+
+def write_config_file(config_path: Path, config: Dict[str, Any]) -> Path:
+    """Write a server config as compact JSON
+    
+    The config is written to a temporary file next to the target and moved
+    into place, so the server never reads a partially written config.
+    """
+    tmp_path = config_path.with_suffix('.json.tmp')
+    tmp_path.write_bytes(dumps_json(config))
+    os.replace(tmp_path, config_path)
+    return config_path
+
+def loads_json(content: bytes) -> Any:
+    """Parse a JSON response body, using orjson if available
+    
+    Raises ValueError on invalid JSON with either parser.
+    """
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+def response_json(response: requests.Response) -> Any:
+    """Parse the JSON body of a response, once
+    
+    The result is kept on the response, so tests sharing a response don't
+    parse it again. Raises ValueError on invalid JSON like loads_json.
+    """
+    try:
+        return response._parsed_json
+    except AttributeError:
+        response._parsed_json = loads_json(response.content)
+        return response._parsed_json
+
+def is_xdist_worker() -> bool:
+    """Check if we are running inside a pytest-xdist worker"""
+    return "PYTEST_XDIST_WORKER" in os.environ
+
+def xdist_worker_index() -> int:
+    """Get the number of the current pytest-xdist worker (0 when not using xdist)"""
+    worker = os.environ.get("PYTEST_XDIST_WORKER", "gw0")
+    suffix = worker[2:]
+    return int(suffix) if suffix.isdigit() else 0
+
+def worker_port(base_port: int) -> int:
+    """Get the server port for the current pytest-xdist worker
+
+    Every worker runs its own AudioControl server, so the base port is offset
+    by the worker number to avoid collisions when running with `pytest -n auto`.
+    """
+    return base_port + xdist_worker_index()
+
+def wait_until(fn, predicate, timeout: float = 3.0, interval: float = 0.01):
+    """Call fn until its result matches a predicate
+    
+    Returns the first matching result, or the last result when the timeout
+    expires so the caller's assertions report the actual value.
+    """
+    deadline = time.perf_counter() + timeout
+    while True:
+        value = fn()
+        if value and predicate(value):
+            return value
+        if time.perf_counter() >= deadline:
+            return value
+        time.sleep(interval)
+
+@dataclass(frozen=True)
+class EventResponse:
+    """Result of sending a player event, validated once instead of probed with dict lookups"""
+    success: bool
+    message: str = ""
+    
+    @classmethod
+    def from_dict(cls, response: Dict[str, Any]) -> "EventResponse":
+        """Build an EventResponse, failing on a missing or non-boolean success field"""
+        if not isinstance(response, dict) or not isinstance(response.get('success'), bool):
+            raise ValueError(f"Invalid event response: {response!r}")
+        return cls(success=response['success'], message=str(response.get('message', '')))
+
+@dataclass(frozen=True)
+class BackgroundJob:
+    """A job from the background jobs API, validated once instead of field by field"""
+    id: str
+    name: str
+    start_time: int
+    last_update: int
+    duration_seconds: int
+    time_since_last_update: int
+    progress: Optional[str] = None
+    total_items: Optional[int] = None
+    completed_items: Optional[int] = None
+    completion_percentage: Optional[float] = None
+    
+    @classmethod
+    def from_dict(cls, job: Dict[str, Any]) -> "BackgroundJob":
+        """Build a BackgroundJob, failing on missing fields or fields of the wrong type"""
+        required = {"id": str, "name": str, "start_time": int, "last_update": int,
+                    "duration_seconds": int, "time_since_last_update": int}
+        optional = {"progress": str, "total_items": int, "completed_items": int,
+                    "completion_percentage": float}
+        if not isinstance(job, dict):
+            raise ValueError(f"Invalid background job: {job!r}")
+        
+        for name, field_type in required.items():
+            if not isinstance(job.get(name), field_type):
+                raise ValueError(f"Background job field '{name}' missing or not {field_type.__name__}: {job!r}")
+        for name, field_type in optional.items():
+            if job.get(name) is not None and not isinstance(job[name], field_type):
+                raise ValueError(f"Background job field '{name}' is not {field_type.__name__}: {job!r}")
+        
+        percentage = job.get("completion_percentage")
+        if percentage is not None and not 0.0 <= percentage <= 100.0:
+            raise ValueError(f"Background job completion percentage out of range: {job!r}")
+        
+        return cls(**{name: job.get(name) for name in (*required, *optional)})
+
 class AudioControlTestServer:
     """Helper class to manage AudioControl server instances for testing"""
     
@@ -63,18 +229,26 @@ class AudioControlTestServer:
         self.config_path: Optional[Path] = None
         self.cache_dir: Optional[Path] = None
         self.server_url = f"http://localhost:{port}"
+        # Keep-alive HTTP session so consecutive API calls reuse the same connection
+        self.session = get_http_session()
+        # Players known to be in their reset state, events remove a player again
+        self.clean_players: set = set()
+        # Last now playing response as (timestamp, response), shared by all callers
+        # until an event is sent or it is older than now_playing_max_age seconds
+        self.now_playing_cache: Optional[tuple] = None
+        self.now_playing_max_age = 0.05
+        self.now_playing_lock = threading.Lock()
+        # Player id found for each kind, None if the server has no player of that kind
+        self.player_ids_by_kind: Dict[str, Optional[str]] = {}
         
     def create_config(self) -> Path:
         """Create a test configuration file based on the static configuration"""
-        # Create cache directory paths
+        # Create cache directories, parents=True creates cache_dir along with the first one
         cache_dir = Path(f"test_cache_{self.port}")
-        cache_dir.mkdir(exist_ok=True)
-        
         attributes_cache_dir = cache_dir / "attributes"
-        attributes_cache_dir.mkdir(exist_ok=True)
-        
         images_cache_dir = cache_dir / "images"
-        images_cache_dir.mkdir(exist_ok=True)
+        attributes_cache_dir.mkdir(parents=True, exist_ok=True)
+        images_cache_dir.mkdir(parents=True, exist_ok=True)
         
         # Choose the appropriate config file for this test type
         config_file = TEST_CONFIGS.get(self.test_name, STATIC_CONFIG_PATH)
@@ -83,8 +257,7 @@ class AudioControlTestServer:
         if not config_file.exists():
             raise FileNotFoundError(f"Configuration file not found at {config_file}")
             
-        with open(config_file, 'r') as f:
-            config = json.load(f)
+        config = loads_json(config_file.read_bytes())
         
         # Update configuration for this test instance
         
@@ -122,19 +295,28 @@ class AudioControlTestServer:
             config["services"]["cache"]["attribute_cache_path"] = str(attributes_cache_dir.absolute())
             config["services"]["cache"]["image_cache_path"] = str(images_cache_dir.absolute())
         
+        # Give every pytest-xdist worker its own settings database and security store
+        self.isolate_worker_storage(config)
+        
         # Create config file
-        self.config_path = Path(f"test_config_{self.port}.json")
-        with open(self.config_path, 'w') as f:
-            json.dump(config, f, indent=2)
+        self.config_path = write_config_file(Path(f"test_config_{self.port}.json"), config)
         
         return self.config_path
     
+    def isolate_worker_storage(self, config: Dict[str, Any]):
+        """Make settings database and security store paths unique per pytest-xdist worker"""
+        if not is_xdist_worker():
+            return
+        
+        for service in ("settingsdb", "security_store"):
+            if service in config["services"] and "path" in config["services"][service]:
+                config["services"][service]["path"] = f"{config['services'][service]['path']}_{self.port}"
+    
     def create_pipes(self):
         """Create test pipes for librespot and raat"""
         # Load the appropriate configuration to see which players are actually configured
         config_file = TEST_CONFIGS.get(self.test_name, STATIC_CONFIG_PATH)
-        with open(config_file, 'r') as f:
-            config = json.load(f)
+        config = loads_json(config_file.read_bytes())
         
         # Only create pipes for players that are actually in the configuration
         for player_config in config["players"]:
@@ -201,7 +383,7 @@ class AudioControlTestServer:
         """Start the AudioControl server"""
         try:
             # Kill any existing processes first
-            self.kill_existing_processes()
+            self.kill_existing_processes(self.port)
             
             # Create config and pipes
             config_path = self.create_config()
@@ -233,17 +415,37 @@ class AudioControlTestServer:
             print(f"Error starting server: {e}")
             return False
     
+    def attach_to_running_server(self, cached: Optional[Dict[str, Any]]) -> bool:
+        """Check if a server started by an earlier test run can be reused
+        
+        The cached entry holds the URL and process id of that server. It is only
+        reused if the process is still alive and answers on the expected URL.
+        """
+        if not cached or cached.get("url") != self.server_url:
+            return False
+        
+        if not psutil.pid_exists(cached.get("pid", -1)):
+            return False
+        
+        try:
+            response = self.session.get(f"{self.server_url}/api/version", timeout=2)
+            return response.status_code == 200
+        except requests.RequestException:
+            return False
+    
     def wait_for_server(self, timeout: int = 40) -> bool:
-        """Wait for the server to be ready"""
-        start_time = time.time()
+        """Wait for the server to be ready
+        
+        Polls with an exponential backoff from 10ms up to 200ms, so a server
+        that comes up quickly is noticed almost immediately.
+        """
+        start_time = time.perf_counter()
         attempt = 0
+        delay = 0.01
         
         print(f"Waiting for server to be ready on port {self.port}...")
         
-        # Wait a bit initially for server to start up (it takes ~4 seconds)
-        time.sleep(3.0)
-        
-        while time.time() - start_time < timeout:
+        while time.perf_counter() - start_time < timeout:
             # Check if process has exited
             if self.process and self.process.poll() is not None:
                 # Process has exited
@@ -258,17 +460,18 @@ class AudioControlTestServer:
             # Try to connect to the version API endpoint
             attempt += 1
             try:
-                response = requests.get(f"{self.server_url}/api/version", timeout=5)
+                response = self.session.get(f"{self.server_url}/api/version", timeout=1)
                 if response.status_code == 200:
-                    print(f"Server is ready and responding on port {self.port}")
+                    elapsed = time.perf_counter() - start_time
+                    print(f"Server is ready and responding on port {self.port} after {elapsed:.2f}s ({attempt} attempts)")
                     return True
             except requests.exceptions.RequestException:
                 # Connection failed, continue waiting
-                elapsed = int(time.time() - start_time)
-                print(f"Attempt {attempt} failed after {elapsed}s - server not ready yet")
+                pass
             
-            # Wait 2 seconds before next attempt
-            time.sleep(2.0)
+            # Back off before the next attempt
+            time.sleep(delay)
+            delay = min(delay * 2, 0.2)
         
         # Timeout reached - get final output from server
         print(f"Timeout waiting for server to start on port {self.port}")
@@ -311,11 +514,19 @@ class AudioControlTestServer:
             shutil.rmtree(cache_dir)
     
     @staticmethod
-    def kill_existing_processes():
-        """Kill any existing audiocontrol processes"""
-        for proc in psutil.process_iter(['pid', 'name']):
+    def kill_existing_processes(port: Optional[int] = None):
+        """Kill any existing audiocontrol processes
+
+        When running under pytest-xdist only the server using the config file
+        for the given port is killed, so workers don't stop each other's servers.
+        """
+        config_name = f"test_config_{port}.json" if port is not None and is_xdist_worker() else None
+        
+        for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
             try:
                 if proc.info['name'] and 'audiocontrol' in proc.info['name'].lower():
+                    if config_name and config_name not in ' '.join(proc.info['cmdline'] or []):
+                        continue
                     proc.kill()
             except (psutil.NoSuchProcess, psutil.AccessDenied):
                 pass
@@ -327,12 +538,22 @@ class AudioControlTestServer:
         # Choose the data format
         request_data = json if json is not None else data
         
+        # Anything but a GET may change what is playing
+        self.request_changed_players(method, endpoint)
+        
+        # Serialize the body ourselves instead of going through requests' json= handling
+        body = None
+        headers = {}
+        if request_data is not None:
+            body = dumps_json(request_data)
+            headers['Content-Type'] = 'application/json'
+        
         if method.upper() == 'GET':
-            response = requests.get(url, timeout=10)
+            response = self.session.get(url, timeout=10)
         elif method.upper() == 'POST':
-            response = requests.post(url, json=request_data, timeout=10)
+            response = self.session.post(url, data=body, headers=headers, timeout=10)
         elif method.upper() == 'DELETE':
-            response = requests.delete(url, json=request_data, timeout=10)
+            response = self.session.delete(url, data=body, headers=headers, timeout=10)
         else:
             raise ValueError(f"Unsupported HTTP method: {method}")
         
@@ -340,19 +561,19 @@ class AudioControlTestServer:
         if expect_error:
             if response.status_code >= 400:
                 try:
-                    return response.json()
+                    return loads_json(response.content)
                 except ValueError:
                     return {"error": f"HTTP {response.status_code}: {response.text}"}
             else:
                 # Expected an error but didn't get one
                 try:
-                    return response.json()
+                    return loads_json(response.content)
                 except ValueError:
                     return {"unexpected_success": True, "status": response.status_code}
         else:
             response.raise_for_status()
             try:
-                return response.json()
+                return loads_json(response.content)
             except ValueError as e:
                 print(f"Error parsing JSON response from {url}: {e}")
                 print(f"Response status: {response.status_code}")
@@ -364,16 +585,43 @@ class AudioControlTestServer:
         url = f"{self.server_url}/{endpoint.lstrip('/')}"
         
         if method.upper() == 'GET':
-            response = requests.get(url, timeout=10)
+            response = self.session.get(url, timeout=10)
             # Don't raise for HTTP errors - let the caller handle them
             return response
         elif method.upper() == 'POST':
-            response = requests.post(url, json=data, timeout=10)
+            self.request_changed_players(method, endpoint)
+            # Serialize the body the same way as api_request
+            body = None
+            headers = {}
+            if data is not None:
+                body = dumps_json(data)
+                headers['Content-Type'] = 'application/json'
+            response = self.session.post(url, data=body, headers=headers, timeout=10)
             # Don't raise for HTTP errors - let the caller handle them
             return response
         else:
             raise ValueError(f"Unsupported HTTP method: {method}")
     
+    def api_json(self, method: str, endpoint: str, json: Any = None) -> Dict[str, Any]:
+        """Make an API request whose response must be a JSON object
+        
+        Fails the test if it isn't, so callers don't have to check the type.
+        """
+        response = self.api_request(method, endpoint, json=json)
+        assert isinstance(response, dict), f"Expected a JSON object from {endpoint}, got {response!r}"
+        return response
+    
+    def settings_batch(self, operations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Run several settings operations in one request
+        
+        Each operation is a dict with 'op' ('get' or 'set'), 'key' and for sets a
+        'value'. The server runs them in order and returns one result per
+        operation, in the format of the single get/set endpoints.
+        """
+        results = self.api_json('POST', '/api/settings/batch', json={"operations": operations})["results"]
+        assert all(isinstance(result, dict) for result in results), f"Expected JSON objects, got {results!r}"
+        return results
+    
     def get_players(self) -> Dict[str, Any]:
         """Get all players from the API"""
         response = self.api_request('GET', '/api/players')
@@ -390,13 +638,98 @@ class AudioControlTestServer:
         
         return response
     
-    def get_players_raw(self) -> Dict[str, Any]:
-        """Get all players from the API in raw format"""
+    def get_players_raw(self, kind: Optional[str] = None) -> Dict[str, Any]:
+        """Get all players from the API in raw format
+        
+        If kind is given the server only returns players of that kind.
+        """
+        if kind:
+            return self.api_request('GET', f'/api/players?kind={quote(kind, safe="")}')
         return self.api_request('GET', '/api/players')
     
+    def get_player_id_of_kind(self, kind: str) -> Optional[str]:
+        """Get the id of the first player of a kind, None if there is none
+        
+        Players are configured at startup, so the result is looked up only once
+        per kind.
+        """
+        if kind not in self.player_ids_by_kind:
+            players_response = self.get_players_raw(kind=kind)
+            players = players_response.get("players", []) if players_response else []
+            self.player_ids_by_kind[kind] = players[0]["id"] if players else None
+        return self.player_ids_by_kind[kind]
+    
     def get_now_playing(self) -> Dict[str, Any]:
-        """Get now playing information"""
-        return self.api_request('GET', '/api/now-playing')
+        """Get now playing information
+        
+        Callers polling at the same time share one request: a response is reused
+        for now_playing_max_age seconds unless an event was sent in between.
+        """
+        with self.now_playing_lock:
+            if self.now_playing_cache is not None:
+                fetched_at, now_playing = self.now_playing_cache
+                if time.perf_counter() - fetched_at < self.now_playing_max_age:
+                    return now_playing
+            
+            now_playing = self.api_request('GET', '/api/now-playing')
+            self.now_playing_cache = (time.perf_counter(), now_playing)
+            return now_playing
+    
+    def player_changed(self, player_name: str):
+        """Forget cached state after an event was sent to a player"""
+        # Any event means the player is no longer in its reset state
+        self.clean_players.discard(player_name)
+        self.now_playing_cache = None
+    
+    def request_changed_players(self, method: str, endpoint: str):
+        """Forget cached state after a request that may have changed a player
+        
+        A request to /api/player/<name>/... only marks that player as changed,
+        any other request but a GET might change the active player, so all
+        players need a reset again.
+        """
+        if method.upper() == 'GET':
+            return
+        
+        parts = endpoint.split('?', 1)[0].strip('/').split('/')
+        if len(parts) > 2 and parts[:2] == ['api', 'player'] and parts[2] != 'active':
+            self.player_changed(parts[2])
+        else:
+            self.clean_players.clear()
+            self.now_playing_cache = None
+    
+    def wait_for(self, predicate, timeout: float = 5.0, interval: float = 0.1) -> bool:
+        """Poll a condition until it is true or the timeout expires
+        
+        Returns True as soon as the predicate returns a truthy value, False
+        if it never did within the timeout.
+        """
+        deadline = time.perf_counter() + timeout
+        while True:
+            if predicate():
+                return True
+            if time.perf_counter() >= deadline:
+                return False
+            time.sleep(interval)
+    
+    def wait_for_now_playing(self, predicate, timeout: float = 2.0, interval: float = 0.02) -> Dict[str, Any]:
+        """Poll now playing information until it matches a predicate
+        
+        Returns as soon as the predicate holds, so tests don't have to sleep for
+        a fixed worst-case time. Returns the last response on timeout so the
+        caller's assertions report the actual state.
+        """
+        return wait_until(self.get_now_playing, predicate, timeout, interval)
+    
+    def snapshot(self, player_id: str = "test_player") -> Dict[str, Any]:
+        """Get the current state of a single player with one API call
+        
+        Use this once after events have settled and run all assertions on the
+        returned dict instead of calling get_players() for every field.
+        """
+        players = self.get_players()
+        assert player_id in players, f"Player '{player_id}' not found in response: {list(players)}"
+        return players[player_id]
     
     def send_player_event(self, player_name: str, event_data: Dict[str, Any]) -> Dict[str, Any]:
         """Send an event to a player using the appropriate tool based on player type"""
@@ -410,8 +743,7 @@ class AudioControlTestServer:
     
     def send_librespot_player_event(self, player_name: str, event_data: Dict[str, Any]) -> Dict[str, Any]:
         """Send an event to a librespot player using audiocontrol_notify_librespot"""
-        import subprocess
-        import os
+        self.player_changed(player_name)
         
         # Check if we have an existing binary to use
         tool_binary_path = self.get_tool_binary_path('audiocontrol_notify_librespot')
@@ -519,8 +851,7 @@ class AudioControlTestServer:
     
     def send_generic_player_event(self, player_name: str, event_data: Dict[str, Any]) -> Dict[str, Any]:
         """Send an event to a generic player using audiocontrol_send_update"""
-        import subprocess
-        import json
+        self.player_changed(player_name)
         
         # Check if we have an existing binary to use
         tool_binary_path = self.get_tool_binary_path('audiocontrol_send_update')
@@ -609,10 +940,24 @@ class AudioControlTestServer:
         except Exception as e:
             return {"success": False, "message": f"Tool execution failed: {str(e)}"}
 
+    def send_player_events_concurrently(self, player_name: str, events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Send independent events to a player in parallel
+        
+        Every event is delivered by its own update tool process (picked like in
+        send_player_event), so events that don't depend on each other can be
+        sent at the same time. Only use this for events where the order of
+        arrival doesn't matter. Responses are returned in the same order as
+        the events.
+        """
+        if not events:
+            return []
+        
+        with ThreadPoolExecutor(max_workers=len(events)) as executor:
+            return list(executor.map(lambda event: self.send_player_event(player_name, event), events))
+
     def send_librespot_event(self, player_name: str, event_type: str, env_vars: Dict[str, str] = None) -> Dict[str, Any]:
         """Send an event to a player using the audiocontrol_notify_librespot tool"""
-        import subprocess
-        import os
+        self.player_changed(player_name)
         
         # Check if we have an existing binary to use
         tool_binary_path = self.get_tool_binary_path('audiocontrol_notify_librespot')
@@ -661,31 +1006,238 @@ class AudioControlTestServer:
         except Exception as e:
             return {"success": False, "message": f"Tool execution failed: {str(e)}"}
 
+    def send_player_events_batch(self, player_name: str, events: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Send several events to a player in a single API request
+        
+        The events are posted as-is to the player events batch endpoint, so they
+        have to be in the format the player controller expects rather than the
+        format the update tools take. The server processes them in order.
+        """
+        self.player_changed(player_name)
+        
+        try:
+            response = self.api_request('POST', f'/api/player/{player_name}/events/batch',
+                                        json={"events": events}, expect_error=True)
+        except requests.RequestException as e:
+            return {"success": False, "message": f"Batch request failed: {e}"}
+        
+        if not isinstance(response, dict) or "success" not in response:
+            error = response.get("error", response) if isinstance(response, dict) else response
+            return {"success": False, "message": f"Batch request failed: {error}"}
+        
+        return response
+    
     def reset_player_state(self, player_id: str = "test_player"):
-        """Reset a player to a known state"""
+        """Reset a player to a known state
+        
+        Skipped if no event was sent to the player since its last reset.
+        """
+        if player_id in self.clean_players:
+            return
+        
+        # Generic players read the loop mode from 'loop_mode', librespot from 'mode'
         reset_events = [
             {"type": "state_changed", "state": "stopped"},
             {"type": "shuffle_changed", "enabled": False},
-            {"type": "loop_mode_changed", "mode": "none"},
+            {"type": "loop_mode_changed", "mode": "none", "loop_mode": "none"},
             {"type": "position_changed", "position": 0.0},
         ]
         
-        for event in reset_events:
+        # Both the batch endpoint and the update tools only return once the
+        # server has processed the events, no need to wait afterwards
+        self.apply_player_events(player_id, reset_events)
+        self.clean_players.add(player_id)
+    
+    def restore_player_state(self, player_id: str, state_events: List[Dict[str, Any]]):
+        """Bring a player into a prepared state
+        
+        state_events is a list of events describing the state, it is deep-copied
+        so the prepared list can be shared between tests.
+        """
+        self.player_changed(player_id)
+        self.apply_player_events(player_id, copy.deepcopy(state_events))
+    
+    def apply_player_events(self, player_id: str, events: List[Dict[str, Any]]):
+        """Send a list of events to a player in order
+        
+        All events are sent in one request, falls back to the update tools
+        if the server doesn't support batches.
+        """
+        response = self.send_player_events_batch(player_id, events)
+        if response.get("success"):
+            return
+        
+        print(f"Batch update failed ({response.get('message')}), sending events one by one")
+        for event in events:
             try:
+                # The update tools wait for the server to process the event, no delay needed
                 self.send_player_event(player_id, event)
-                time.sleep(0.1)  # Small delay between events for better reliability
             except Exception as e:
-                print(f"Warning: Failed to send reset event {event} to player {player_id}: {e}")
+                print(f"Warning: Failed to send event {event} to player {player_id}: {e}")
+
+class PlayerEventStream:
+    """Receives player events from the server's WebSocket event API
+    
+    Lets tests block until a specific event arrives instead of polling the
+    REST API. The server pushes queued events every 100ms.
+    """
+    
+    def __init__(self, server: AudioControlTestServer):
+        self.url = f"ws://localhost:{server.port}/api/events"
+        self.events: queue.Queue = queue.Queue()
+        self.connected = threading.Event()
+        self.connection: Optional[websocket.WebSocketApp] = None
+        self.thread: Optional[threading.Thread] = None
+    
+    def connect(self, timeout: float = 5.0) -> bool:
+        """Open the WebSocket connection and wait for the server's welcome message"""
+        def on_message(ws, message):
+            try:
+                event = json.loads(message)
+            except ValueError:
+                print(f"Failed to parse WebSocket message: {message}")
+                return
+            if event.get("type") == "welcome":
+                self.connected.set()
+            else:
+                self.events.put(event)
+        
+        def on_error(ws, error):
+            print(f"WebSocket error: {error}")
+        
+        self.connection = websocket.WebSocketApp(self.url, on_message=on_message, on_error=on_error)
+        self.thread = threading.Thread(target=self.connection.run_forever, daemon=True)
+        self.thread.start()
+        return self.connected.wait(timeout)
+    
+    def close(self):
+        """Close the WebSocket connection"""
+        if self.connection:
+            self.connection.close()
+        if self.thread:
+            self.thread.join(timeout=2.0)
+    
+    def clear(self):
+        """Drop all events received so far"""
+        while True:
+            try:
+                self.events.get_nowait()
+            except queue.Empty:
+                return
+    
+    def wait_for_event(self, predicate, timeout: float = 5.0) -> Optional[Dict[str, Any]]:
+        """Block until an event matching the predicate arrives, None on timeout"""
+        deadline = time.perf_counter() + timeout
+        while True:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                return None
+            try:
+                event = self.events.get(timeout=remaining)
+            except queue.Empty:
+                return None
+            if predicate(event):
+                return event
+
+def mock_request_key(method: str, path: str, body: Any = None) -> str:
+    """Build the key under which a recorded response is stored"""
+    body_hash = hashlib.sha256(json.dumps(body, sort_keys=True).encode()).hexdigest()
+    return f"{method.upper()} /{path.lstrip('/')} {body_hash}"
+
+def mock_file_for_test(node) -> Path:
+    """Get the mock file that belongs to a test"""
+    module_name = Path(str(node.fspath)).stem
+    test_name = re.sub(r"[^\w.-]", "_", node.name)
+    return MOCKS_DIR / module_name / f"{test_name}.json"
+
+def record_mocks(server: AudioControlTestServer, mock_file: Path):
+    """Record every API response and player event result of a running server
+    
+    Returns a function that writes the recorded responses to the mock file
+    and stops recording.
+    """
+    recorded: Dict[str, List[Any]] = {}
+    api_request = server.api_request
+    
+    # A replayed server starts without clean players, so every player reset
+    # has to happen, and be recorded, while recording too
+    server.clean_players.clear()
+    send_generic_player_event = server.send_generic_player_event
+    
+    def recording_api_request(method: str, endpoint: str, data: Any = None, json: Any = None, expect_error: bool = False) -> Any:
+        response = api_request(method, endpoint, data=data, json=json, expect_error=expect_error)
+        body = json if json is not None else data
+        recorded.setdefault(mock_request_key(method, endpoint, body), []).append(response)
+        return response
+    
+    def recording_send_generic_player_event(player_name: str, event_data: Dict[str, Any]) -> Dict[str, Any]:
+        response = send_generic_player_event(player_name, event_data)
+        key = mock_request_key('POST', f"/api/player/{player_name}/update", event_data)
+        recorded.setdefault(key, []).append(response)
+        return response
+    
+    server.api_request = recording_api_request
+    server.send_generic_player_event = recording_send_generic_player_event
+    
+    def save():
+        # The server is shared with the next tests, which record to their own file
+        server.api_request = api_request
+        server.send_generic_player_event = send_generic_player_event
         
-        time.sleep(0.5)  # Longer wait for reset to complete
+        mock_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(mock_file, 'w') as f:
+            json.dump(recorded, f, indent=2, sort_keys=True)
+        print(f"Recorded {len(recorded)} mock responses to {mock_file}")
+    
+    return save
+
+class MockGenericServer(AudioControlTestServer):
+    """Replays recorded responses instead of talking to a running AudioControl server"""
+    
+    def __init__(self, mock_file: Path):
+        super().__init__("generic", worker_port(TEST_PORTS['generic']))
+        self.mock_file = mock_file
+        with open(mock_file, 'r') as f:
+            self.responses: Dict[str, List[Any]] = json.load(f)
+    
+    def start_server(self) -> bool:
+        """Nothing to start when replaying recorded responses"""
+        return True
+    
+    def stop_server(self):
+        """Nothing to stop when replaying recorded responses"""
+        pass
+    
+    def replay(self, key: str) -> Any:
+        """Return the next recorded response for a request, repeating the last one when exhausted"""
+        responses = self.responses.get(key)
+        if not responses:
+            pytest.fail(f"No recorded response for {key} in {self.mock_file}, re-record with RECORD_MOCKS=1")
+        
+        return responses.pop(0) if len(responses) > 1 else responses[0]
+    
+    def api_request(self, method: str, endpoint: str, data: Any = None, json: Any = None, expect_error: bool = False) -> Any:
+        """Replay a recorded API response"""
+        self.request_changed_players(method, endpoint)
+        body = json if json is not None else data
+        return self.replay(mock_request_key(method, endpoint, body))
+    
+    def send_generic_player_event(self, player_name: str, event_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Replay the recorded result of a player event"""
+        self.player_changed(player_name)
+        return self.replay(mock_request_key('POST', f"/api/player/{player_name}/update", event_data))
 
 # Global cleanup function
 def cleanup_all_servers():
     """Clean up all test servers and temporary files"""
-    AudioControlTestServer.kill_existing_processes()
+    # Only touch the ports of this pytest-xdist worker (all ports without xdist)
+    ports = sorted({worker_port(port) for port in TEST_PORTS.values()})
+    
+    for port in ports:
+        AudioControlTestServer.kill_existing_processes(port)
     
     # Clean up config files and cache directories
-    for port in TEST_PORTS.values():
+    for port in ports:
         config_path = Path(f"test_config_{port}.json")
         if config_path.exists():
             try:
@@ -703,10 +1255,12 @@ def cleanup_all_servers():
                 print(f"Warning: Failed to remove {cache_dir}: {e}")
     
     # Clean up pipe files for librespot, raat, etc.
+    # Other pytest-xdist workers might still be using their pipes
+    pipe_suffixes = [str(port) for port in ports] if is_xdist_worker() else ["*"]
     pipe_patterns = [
-        "test_librespot_event_*",
-        "test_raat_metadata_*",
-        "test_raat_control_*"
+        f"{prefix}{suffix}"
+        for prefix in ("test_librespot_event_", "test_raat_metadata_", "test_raat_control_")
+        for suffix in pipe_suffixes
     ]
     
     # Clean up in both the current directory and /tmp (for Unix systems)
@@ -746,34 +1300,227 @@ def cleanup_all_servers():
             except Exception as e:
                 print(f"Warning: Failed to remove {file_path}: {e}")
 
+def pytest_addoption(parser):
+    """Register the command line options of the integration tests"""
+    parser.addoption(
+        "--reuse-server", action="store_true", default=False,
+        help="Keep the librespot test server running after the run and reuse it in later runs",
+    )
+    parser.addoption(
+        "--run-network", action="store_true", default=False,
+        help="Also run tests marked with network that need access to the internet",
+    )
+    parser.addoption(
+        "--run-slow", action="store_true", default=False,
+        help="Also run tests marked with slow that take a long time by design",
+    )
+
+def pytest_configure(config):
+    """Register the markers used by the integration tests"""
+    config.addinivalue_line("markers", "network: test needs access to the internet, only runs with --run-network")
+    config.addinivalue_line("markers", "slow: test takes a long time by design, only runs with --run-slow")
+    config.addinivalue_line("markers", "needs_theaudiodb: test is skipped when TheAudioDB is not a cover art provider")
+
+def pytest_collection_modifyitems(config, items):
+    """Skip tests that need the internet or are slow unless --run-network or --run-slow is given"""
+    skips = {}
+    if not config.getoption("run_network"):
+        skips["network"] = pytest.mark.skip(reason="needs internet access, use --run-network to run")
+    if not config.getoption("run_slow"):
+        skips["slow"] = pytest.mark.skip(reason="slow test, use --run-slow to run")
+    if not skips:
+        return
+    
+    for item in items:
+        for keyword, skip in skips.items():
+            if keyword in item.keywords:
+                item.add_marker(skip)
+
 # Pytest fixtures
 @pytest.fixture(scope="session", autouse=True)
-def setup_and_cleanup():
+def setup_and_cleanup(pytestconfig):
     """Setup and cleanup for the entire test session"""
-    cleanup_all_servers()
+    # A reused server must survive the session, so leave running servers alone
+    reuse_server = pytestconfig.getoption("reuse_server")
+    if not reuse_server:
+        cleanup_all_servers()
     yield
-    cleanup_all_servers()
+    close_http_session()
+    if not reuse_server:
+        cleanup_all_servers()
 
-@pytest.fixture
-def generic_server():
-    """Fixture for generic integration tests"""
-    server = AudioControlTestServer("generic", TEST_PORTS['generic'])
+@pytest.fixture(scope="module")
+def generic_server_process():
+    """Generic test server, started once per test module
+    
+    Module scope rather than session scope, because all servers share the same
+    port and starting another server stops any running one. The tests use
+    unique setting keys and send the player state they check, so they don't
+    need a fresh server.
+    """
+    server = AudioControlTestServer("generic", worker_port(TEST_PORTS['generic']))
     assert server.start_server(), "Failed to start generic test server"
     yield server
     server.stop_server()
 
 @pytest.fixture
-def librespot_server():
-    """Fixture for librespot integration tests"""
-    server = AudioControlTestServer("librespot", TEST_PORTS['librespot'])
-    assert server.start_server(), "Failed to start librespot test server"
+def generic_server(generic_server_process):
+    """Fixture for tests that talk to the generic test server"""
+    return generic_server_process
+
+@pytest.fixture
+def replayable_generic_server(request):
+    """Generic test server whose responses can be recorded and replayed
+    
+    With USE_MOCK_SERVER=1 the responses are replayed from the recorded mocks
+    instead of starting a server, with RECORD_MOCKS=1 they are recorded. Only
+    test_generic_integration.py uses it, other tests send requests that differ
+    between runs and can't be replayed.
+    """
+    mock_file = mock_file_for_test(request.node)
+    
+    if os.environ.get("USE_MOCK_SERVER"):
+        if not mock_file.exists():
+            pytest.fail(f"No recorded mocks for this test: {mock_file}, record them with RECORD_MOCKS=1")
+        yield MockGenericServer(mock_file)
+        return
+    
+    # Only start the real server when the responses are not replayed
+    server = request.getfixturevalue("generic_server_process")
+    save_mocks = record_mocks(server, mock_file) if os.environ.get("RECORD_MOCKS") else None
     yield server
-    server.stop_server()
+    
+    if save_mocks:
+        save_mocks()
+
+@pytest.fixture(scope="module")
+def librespot_server(pytestconfig):
+    """Fixture for librespot integration tests
+    
+    The server is started once per test module, tests reset the player state
+    themselves. Module scope rather than session scope, because all servers
+    share the same port and starting another server stops any running one.
+    
+    With --reuse-server the server is left running after the run and reused
+    by the next run as long as it is still alive.
+    """
+    server = AudioControlTestServer("librespot", worker_port(TEST_PORTS['librespot']))
+    
+    if not pytestconfig.getoption("reuse_server"):
+        assert server.start_server(), "Failed to start librespot test server"
+        yield server
+        server.stop_server()
+        return
+    
+    cache_key = f"librespot_server/{server.port}"
+    if server.attach_to_running_server(pytestconfig.cache.get(cache_key, None)):
+        print(f"Reusing librespot test server on port {server.port}")
+    else:
+        assert server.start_server(), "Failed to start librespot test server"
+        pytestconfig.cache.set(cache_key, {"url": server.server_url, "pid": server.process.pid})
+    yield server
+
+def find_player_id(server: AudioControlTestServer, preferred: List[str]) -> str:
+    """Look up the id of the player to run tests against
+    
+    Entries in preferred are tried in order, the server is asked for players
+    of that kind. Falls back to the first player and skips the test when no
+    players are configured.
+    """
+    for kind in preferred:
+        player_id = server.get_player_id_of_kind(kind)
+        if player_id:
+            return player_id
+    
+    players_response = server.get_players_raw()
+    players = players_response.get("players", []) if players_response else []
+    if not players:
+        pytest.skip("No players available for testing")
+    
+    return players[0]["id"]
+
+@pytest.fixture(scope="module")
+def librespot_player_id(librespot_server):
+    """Id of the librespot player, looked up once per module"""
+    return find_player_id(librespot_server, ["librespot"])
+
+@pytest.fixture(scope="module")
+def test_player_id(librespot_server):
+    """Id of test_player if configured, otherwise the librespot player"""
+    return find_player_id(librespot_server, ["test_player", "librespot"])
+
+@pytest.fixture(scope="module")
+def librespot_players_snapshot(librespot_server):
+    """Players response fetched once per module, for tests that only read it"""
+    return librespot_server.get_players_raw()
+
+@pytest.fixture
+def clean_librespot_player(librespot_server, librespot_player_id):
+    """Id of the librespot player, reset to a known state before the test"""
+    logger.debug("Using player: %s", librespot_player_id)
+    librespot_server.reset_player_state(librespot_player_id)
+    return librespot_player_id
+
+@pytest.fixture
+def clean_test_player(librespot_server, test_player_id):
+    """Id of the player from test_player_id, reset to a known state before the test"""
+    logger.debug("Using player: %s", test_player_id)
+    librespot_server.reset_player_state(test_player_id)
+    return test_player_id
+
+@pytest.fixture(scope="module")
+def librespot_track_state(librespot_server, librespot_player_id):
+    """Events that put the librespot player in a stopped state with a track loaded
+    
+    Checked against the server once per module, tests restore it through
+    the librespot_player_with_track fixture.
+    """
+    state_events = [
+        {"type": "state_changed", "state": "stopped"},
+        {"type": "shuffle_changed", "enabled": False},
+        {"type": "loop_mode_changed", "mode": "none", "loop_mode": "none"},
+        {"type": "position_changed", "position": 0.0},
+        {
+            "type": "song_changed",
+            "song": {
+                "title": "Test Track for Position",
+                "artist": "Test Artist",
+                "album": "Test Album",
+                "duration": 300.0,
+                "uri": "spotify:track:test123"
+            }
+        },
+    ]
+    librespot_server.restore_player_state(librespot_player_id, state_events)
+    now_playing = librespot_server.wait_for_now_playing(
+        lambda n: (n.get("song") or {}).get("title") == "Test Track for Position")
+    song = (now_playing or {}).get("song") or {}
+    assert song.get("title") == "Test Track for Position", f"Prepared librespot track state was not applied: {now_playing}"
+    return state_events
+
+@pytest.fixture
+def librespot_player_with_track(librespot_server, librespot_player_id, librespot_track_state):
+    """Id of the librespot player, restored to the prepared track state"""
+    logger.debug("Using player: %s", librespot_player_id)
+    librespot_server.restore_player_state(librespot_player_id, librespot_track_state)
+    return librespot_player_id
+
+@pytest.fixture(scope="module")
+def event_stream(librespot_server):
+    """WebSocket event stream of the librespot test server, None if it can't connect"""
+    stream = PlayerEventStream(librespot_server)
+    if not stream.connect():
+        print("WebSocket event stream not available, tests will poll instead")
+        stream.close()
+        yield None
+        return
+    yield stream
+    stream.close()
 
 @pytest.fixture
 def activemonitor_server():
     """Fixture for active monitor integration tests"""
-    server = AudioControlTestServer("activemonitor", TEST_PORTS['activemonitor'])
+    server = AudioControlTestServer("activemonitor", worker_port(TEST_PORTS['activemonitor']))
     assert server.start_server(), "Failed to start activemonitor test server"
     yield server
     server.stop_server()
@@ -781,7 +1528,7 @@ def activemonitor_server():
 @pytest.fixture
 def raat_server():
     """Fixture for RAAT integration tests"""
-    server = AudioControlTestServer("raat", TEST_PORTS['raat'])
+    server = AudioControlTestServer("raat", worker_port(TEST_PORTS['raat']))
     assert server.start_server(), "Failed to start RAAT test server"
     yield server
     server.stop_server()
@@ -789,7 +1536,7 @@ def raat_server():
 @pytest.fixture
 def cache_server():
     """Fixture for cache integration tests"""
-    server = AudioControlTestServer("cache", TEST_PORTS['cache'])
+    server = AudioControlTestServer("cache", worker_port(TEST_PORTS['cache']))
     assert server.start_server(), "Failed to start cache test server"
     yield server
     server.stop_server()
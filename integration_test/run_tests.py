@@ -42,6 +42,14 @@ def build_audiocontrol():
     print("AudioControl built successfully")
     return True
 
+def xdist_available():
+    """Check if pytest-xdist is installed"""
+    try:
+        import xdist
+        return True
+    except ImportError:
+        return False
+
 def run_tests():
     """Run the integration tests"""
     test_dir = Path(__file__).parent
@@ -49,23 +57,24 @@ def run_tests():
     print("Running integration tests...")
     
     # Run all test files
-    test_files = [
-        "test_generic_integration.py",
-        "test_librespot_integration.py",
-        "test_activemonitor_integration.py",
-        "test_raat_integration.py",
-        "test_mpd_integration.py",
-        "test_websocket.py"
-    ]
+    test_files = sorted(test_file.name for test_file in test_dir.glob("test_*.py"))
+    
+    # With pytest-xdist, run all files in one parallel session. --dist=loadfile
+    # keeps the tests of a file on one worker, so module-scoped servers are
+    # started once per file
+    if xdist_available():
+        test_paths = [str(test_dir / test_file) for test_file in test_files]
+        print(f"Running {len(test_paths)} test files in parallel with pytest-xdist")
+        result = subprocess.run([
+            sys.executable, "-m", "pytest", *test_paths, "-v", "--tb=short", "-n", "auto", "--dist=loadfile"
+        ])
+        return result.returncode == 0
     
     all_passed = True
     
     for test_file in test_files:
         test_path = test_dir / test_file
-        if not test_path.exists():
-            print(f"Warning: Test file {test_file} not found")
-            continue
-            
+        
         print(f"\\n{'='*50}")
         print(f"Running {test_file}")
         print(f"{'='*50}")
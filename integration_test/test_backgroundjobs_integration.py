@@ -5,6 +5,7 @@ This module tests the basic functionality of the background jobs API endpoints.
 """
 
 import pytest
+import time
 
 
 def test_background_jobs_endpoint_basic(generic_server):
@@ -45,11 +46,9 @@ def test_background_job_by_id_not_found(generic_server):
 
 def test_background_jobs_api_response_performance(generic_server):
     """Test that background jobs API responds quickly."""
-    import time
-    
-    start_time = time.time()
+    start_time = time.perf_counter()
     response = generic_server.api_request('GET', '/api/background/jobs')
-    response_time = time.time() - start_time
+    response_time = time.perf_counter() - start_time
     
     # Verify the API works
     assert isinstance(response, dict)
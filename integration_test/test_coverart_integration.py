@@ -4,42 +4,42 @@ Cover Art API integration tests for AudioControl system
 """
 
 import pytest
-import json
 import time
 import base64
+import tempfile
 from pathlib import Path
-from conftest import AudioControlTestServer, TEST_PORTS
-import requests
+from conftest import AudioControlTestServer, TEST_PORTS, worker_port, loads_json, dumps_json, response_json
 
 # Test configuration for cover art
 TEST_CONFIG_PATH = Path(__file__).parent / "test_config_generic.json"
 
+# Image formats the cover art API may report
+IMAGE_FORMATS = frozenset({"JPEG", "PNG", "GIF", "WebP", "BMP"})
+
+# Request bodies are serialized with dumps_json, like the server helpers do
+JSON_HEADERS = {"Content-Type": "application/json"}
+
 @pytest.fixture
 def coverart_server():
     """Fixture for cover art integration tests"""
-    server = AudioControlTestServer("coverart", TEST_PORTS['generic'])
+    server = AudioControlTestServer("coverart", worker_port(TEST_PORTS['generic']))
     
     # Override the config path to use our custom config
     original_create_config = server.create_config
     
     def create_custom_config():
         """Create config with cover art providers enabled"""
-        import tempfile
-        import shutil
-        
-        # Create cache directories
+        # Create cache directories, parents=True creates cache_dir along with the first one
         cache_dir = Path(f"test_cache_{server.port}")
-        cache_dir.mkdir(exist_ok=True)
         attributes_cache_dir = cache_dir / "attributes"
-        attributes_cache_dir.mkdir(exist_ok=True)
         images_cache_dir = cache_dir / "images"
-        images_cache_dir.mkdir(exist_ok=True)
+        attributes_cache_dir.mkdir(parents=True, exist_ok=True)
+        images_cache_dir.mkdir(parents=True, exist_ok=True)
         
         server.cache_dir = cache_dir
         
         # Load the base config
-        with open(TEST_CONFIG_PATH, 'r') as f:
-            config = json.load(f)
+        config = loads_json(TEST_CONFIG_PATH.read_bytes())
         
         # Update port
         config["services"]["webserver"]["port"] = server.port
@@ -96,9 +96,12 @@ def coverart_server():
             if "rate_limit_ms" not in config["services"]["musicbrainz"]:
                 config["services"]["musicbrainz"]["rate_limit_ms"] = 1000
         
+        # Keep settings storage separate per pytest-xdist worker
+        server.isolate_worker_storage(config)
+        
         # Create config file
-        config_file = tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False)
-        json.dump(config, config_file, indent=2)
+        config_file = tempfile.NamedTemporaryFile(mode='wb', suffix='.json', delete=False)
+        config_file.write(dumps_json(config))
         config_file.close()
         
         server.config_path = Path(config_file.name)
@@ -120,13 +123,13 @@ class TestCoverArtAPI:
         # Check if there's a methods endpoint to see what providers are available
         url = f"{coverart_server.server_url}/api/coverart/methods"
         print(f"Checking providers at: {url}")
-        response = requests.get(url, timeout=30)
+        response = coverart_server.session.get(url, timeout=30)
         
         print(f"Methods endpoint status: {response.status_code}")
         print(f"Methods response: {response.text}")
         
         if response.status_code == 200:
-            data = response.json()
+            data = response_json(response)
             print(f"Available methods: {data}")
         else:
             print("Methods endpoint not available - testing basic functionality")
@@ -144,14 +147,14 @@ class TestCoverArtAPI:
         # Make API request
         url = f"{coverart_server.server_url}/api/coverart/artist/{artist_b64}"
         print(f"Making request to: {url}")
-        response = requests.get(url, timeout=30)
+        response = coverart_server.session.get(url, timeout=30)
         
         # Check response
         print(f"Response status: {response.status_code}")
         print(f"Response text: {response.text}")
         assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
         
-        data = response.json()
+        data = response_json(response)
         print(f"Response data: {data}")
         assert "results" in data, f"Response missing 'results' field: {data}"
         
@@ -207,7 +210,7 @@ class TestCoverArtAPI:
                 
                 if "format" in image:
                     assert isinstance(image["format"], str), "Image format should be string"
-                    assert image["format"] in ["JPEG", "PNG", "GIF", "WebP", "BMP"], f"Unknown image format: {image['format']}"
+                    assert image["format"] in IMAGE_FORMATS, f"Unknown image format: {image['format']}"
         
         print(f"✓ Successfully retrieved cover art for {artist_name}")
         total_images = sum(len(result["images"]) for result in data["results"])
@@ -245,12 +248,12 @@ class TestCoverArtAPI:
         
         # Make API request
         url = f"{coverart_server.server_url}/api/coverart/artist/{artist_b64}"
-        response = requests.get(url, timeout=30)
+        response = coverart_server.session.get(url, timeout=30)
         
         # Check response
         assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
         
-        data = response.json()
+        data = response_json(response)
         assert "results" in data, f"Response missing 'results' field: {data}"
         
         # Results should be empty or contain empty image lists
@@ -268,12 +271,12 @@ class TestCoverArtAPI:
         
         # Make API request
         url = f"{coverart_server.server_url}/api/coverart/artist/{invalid_b64}"
-        response = requests.get(url, timeout=30)
+        response = coverart_server.session.get(url, timeout=30)
         
         # Should handle gracefully and return empty results
         assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
         
-        data = response.json()
+        data = response_json(response)
         assert "results" in data, f"Response missing 'results' field: {data}"
         assert len(data["results"]) == 0, "Expected empty results for invalid base64"
 
@@ -294,14 +297,14 @@ class TestCoverArtAPI:
         # Make API request
         url = f"{coverart_server.server_url}/api/coverart/album/{title_b64}/{artist_b64}"
         print(f"Making album cover art request to: {url}")
-        response = requests.get(url, timeout=30)
+        response = coverart_server.session.get(url, timeout=30)
         
         # Check response
         print(f"Response status: {response.status_code}")
         print(f"Response text: {response.text}")
         assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
         
-        data = response.json()
+        data = response_json(response)
         print(f"Response data: {data}")
         assert "results" in data, f"Response missing 'results' field: {data}"
         
@@ -337,14 +340,14 @@ class TestCoverArtAPI:
         # Make API request
         url = f"{coverart_server.server_url}/api/coverart/album/{title_b64}/{artist_b64}/{year}"
         print(f"Making album cover art request with year to: {url}")
-        response = requests.get(url, timeout=30)
+        response = coverart_server.session.get(url, timeout=30)
         
         # Check response
         print(f"Response status: {response.status_code}")
         print(f"Response text: {response.text}")
         assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
         
-        data = response.json()
+        data = response_json(response)
         print(f"Response data: {data}")
         assert "results" in data, f"Response missing 'results' field: {data}"
         
@@ -382,14 +385,14 @@ class TestCoverArtAPI:
         print(f"Making POST request to: {update_url}")
         print(f"Payload: {update_payload}")
         
-        response = requests.post(update_url, json=update_payload, timeout=30)
+        response = coverart_server.session.post(update_url, data=dumps_json(update_payload), headers=JSON_HEADERS, timeout=30)
         
         print(f"Update response status: {response.status_code}")
         print(f"Update response text: {response.text}")
         
         assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
         
-        data = response.json()
+        data = response_json(response)
         print(f"Update response data: {data}")
         
         # Verify response structure
@@ -405,11 +408,11 @@ class TestCoverArtAPI:
         get_url = f"{coverart_server.server_url}/api/coverart/artist/{artist_b64}"
         print(f"Making GET request to verify update: {get_url}")
         
-        get_response = requests.get(get_url, timeout=30)
+        get_response = coverart_server.session.get(get_url, timeout=30)
         print(f"Get response status: {get_response.status_code}")
         
         if get_response.status_code == 200:
-            get_data = get_response.json()
+            get_data = response_json(get_response)
             print(f"Get response data: {get_data}")
             
             # The custom image should now be included in the results
@@ -422,7 +425,7 @@ class TestCoverArtAPI:
         invalid_url = f"{coverart_server.server_url}/api/coverart/artist/{invalid_artist_b64}/update"
         
         print(f"Testing invalid encoding with: {invalid_url}")
-        invalid_response = requests.post(invalid_url, json=update_payload, timeout=30)
+        invalid_response = coverart_server.session.post(invalid_url, data=dumps_json(update_payload), headers=JSON_HEADERS, timeout=30)
         
         print(f"Invalid encoding response status: {invalid_response.status_code}")
         print(f"Invalid encoding response text: {invalid_response.text}")
@@ -430,7 +433,7 @@ class TestCoverArtAPI:
         # Should return 200 with success=false for invalid encoding
         assert invalid_response.status_code == 200, f"Expected 200 for invalid encoding, got {invalid_response.status_code}"
         
-        invalid_data = invalid_response.json()
+        invalid_data = response_json(invalid_response)
         assert "success" in invalid_data, f"Response missing 'success' field: {invalid_data}"
         assert invalid_data["success"] is False, f"Invalid encoding should fail: {invalid_data}"
         assert "invalid" in invalid_data["message"].lower(), f"Error message should mention invalid encoding: {invalid_data['message']}"
@@ -439,14 +442,14 @@ class TestCoverArtAPI:
         empty_url_payload = {"url": ""}
         print(f"Testing empty URL with payload: {empty_url_payload}")
         
-        empty_response = requests.post(update_url, json=empty_url_payload, timeout=30)
+        empty_response = coverart_server.session.post(update_url, data=dumps_json(empty_url_payload), headers=JSON_HEADERS, timeout=30)
         print(f"Empty URL response status: {empty_response.status_code}")
         print(f"Empty URL response text: {empty_response.text}")
         
         # Should succeed (empty URL clears custom image)
         assert empty_response.status_code == 200, f"Expected 200 for empty URL, got {empty_response.status_code}"
         
-        empty_data = empty_response.json()
+        empty_data = response_json(empty_response)
         assert empty_data["success"] is True, f"Empty URL should succeed (clears custom image): {empty_data}"
         
         print(f"✓ Artist image update API working correctly for {artist_name}")
@@ -468,13 +471,13 @@ class TestCoverArtAPI:
         url = f"{coverart_server.server_url}/api/coverart/artist/{artist_b64}"
         print(f"Requesting: {url}")
         
-        response = requests.get(url, timeout=30)
+        response = coverart_server.session.get(url, timeout=30)
         print(f"Response status: {response.status_code}")
         print(f"Response content length: {len(response.text)}")
         
         assert response.status_code == 200, f"Expected 200, got {response.status_code}"
         
-        data = response.json()
+        data = response_json(response)
         print(f"Response data keys: {list(data.keys())}")
         
         assert "results" in data, f"Response missing 'results' field: {data}"
@@ -554,10 +557,10 @@ class TestCoverArtAPI:
         # First, try to get artist coverart to trigger image caching
         print(f"First requesting coverart metadata for {artist_name} to trigger caching...")
         coverart_url = f"{coverart_server.server_url}/api/coverart/artist/{artist_b64}"
-        response = requests.get(coverart_url, timeout=30)
+        response = coverart_server.session.get(coverart_url, timeout=30)
         assert response.status_code == 200, f"Failed to get coverart metadata: {response.status_code}"
         
-        coverart_data = response.json()
+        coverart_data = response_json(response)
         print(f"Coverart metadata response: {len(coverart_data.get('results', []))} provider(s)")
         
         # Verify we have at least one provider with images before expecting download to work
@@ -585,21 +588,21 @@ class TestCoverArtAPI:
         print(f"Making request to artist image endpoint: {image_url}")
         
         # Try the endpoint - the first call should trigger download
-        image_response = requests.get(image_url, timeout=30)
+        image_response = coverart_server.session.get(image_url, timeout=30)
         print(f"Image endpoint response status: {image_response.status_code}")
         
         # If we get 404 on first try, wait a bit and try again - download might be in progress
         if image_response.status_code == 404:
             print("First attempt returned 404, waiting 5 seconds for download to complete...")
             time.sleep(5)
-            image_response = requests.get(image_url, timeout=30)
+            image_response = coverart_server.session.get(image_url, timeout=30)
             print(f"Second attempt response status: {image_response.status_code}")
         
         # If still 404, try one more time with a longer wait
         if image_response.status_code == 404:
             print("Second attempt returned 404, waiting 10 seconds for download to complete...")
             time.sleep(10)
-            image_response = requests.get(image_url, timeout=30)
+            image_response = coverart_server.session.get(image_url, timeout=30)
             print(f"Third attempt response status: {image_response.status_code}")
         
         # Log the 404 response to understand why download didn't work
@@ -616,12 +619,12 @@ class TestCoverArtAPI:
                         if image.get('url', '').startswith(('http://', 'https://')):
                             update_payload = {"url": image['url']}
                             print(f"Manually downloading: {image['url'][:80]}...")
-                            update_response = requests.post(update_url, json=update_payload, timeout=30)
+                            update_response = coverart_server.session.post(update_url, data=dumps_json(update_payload), headers=JSON_HEADERS, timeout=30)
                             print(f"Manual update response: {update_response.status_code} - {update_response.text}")
                             
                             # Try the image endpoint one more time after manual trigger
                             time.sleep(5)  # Wait longer for download to complete
-                            final_response = requests.get(image_url, timeout=30)
+                            final_response = coverart_server.session.get(image_url, timeout=30)
                             print(f"Final image endpoint response: {final_response.status_code}")
                             if final_response.status_code == 200:
                                 image_response = final_response
@@ -686,7 +689,7 @@ class TestCoverArtAPI:
         image_url = f"{coverart_server.server_url}/api/coverart/artist/{invalid_b64}/image"
         print(f"Testing invalid base64: {image_url}")
         
-        response = requests.get(image_url, timeout=10)
+        response = coverart_server.session.get(image_url, timeout=10)
         print(f"Response status: {response.status_code}")
         # The server appears to be more permissive and handles invalid base64 gracefully
         # Instead of expecting a 400, we should expect either 404 (not found) or 200 with no image
@@ -698,7 +701,7 @@ class TestCoverArtAPI:
         image_url = f"{coverart_server.server_url}/api/coverart/artist/{artist_b64}/image"
         print(f"Testing non-existent artist: {image_url}")
         
-        response = requests.get(image_url, timeout=10)
+        response = coverart_server.session.get(image_url, timeout=10)
         print(f"Response status: {response.status_code}")
         assert response.status_code == 404, f"Expected 404 for non-existent artist, got {response.status_code}"
         
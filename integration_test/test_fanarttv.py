@@ -4,41 +4,39 @@ FanArt.tv integration tests for AudioControl system
 """
 
 import pytest
-import json
+import base64
 import time
 import os
 from pathlib import Path
-from conftest import AudioControlTestServer, TEST_PORTS
+from conftest import AudioControlTestServer, TEST_PORTS, worker_port, loads_json, write_config_file
 
 # Test configuration for FanArt.tv
 TEST_CONFIG_PATH = Path(__file__).parent / "test_config_fanarttv.json"
 
+# Names the FanArt.tv provider may be reported under
+FANARTTV_PROVIDER_NAMES = frozenset({'fanarttv', 'fanarttv_coverart', 'fanart.tv', 'fanart.tv cover art'})
+
 @pytest.fixture
 def fanarttv_server():
     """Fixture for FanArt.tv integration tests"""
-    server = AudioControlTestServer("fanarttv", TEST_PORTS['fanarttv'])
+    server = AudioControlTestServer("fanarttv", worker_port(TEST_PORTS['fanarttv']))
     
     # Override the config path to use our custom config
     original_create_config = server.create_config
     
     def create_custom_config():
         """Create config with FanArt.tv enabled"""
-        import tempfile
-        import shutil
-        
-        # Create cache directories
+        # Create cache directories, parents=True creates cache_dir along with the first one
         cache_dir = Path(f"test_cache_{server.port}")
-        cache_dir.mkdir(exist_ok=True)
         attributes_cache_dir = cache_dir / "attributes"
-        attributes_cache_dir.mkdir(exist_ok=True)
         images_cache_dir = cache_dir / "images"
-        images_cache_dir.mkdir(exist_ok=True)
+        attributes_cache_dir.mkdir(parents=True, exist_ok=True)
+        images_cache_dir.mkdir(parents=True, exist_ok=True)
         
         server.cache_dir = cache_dir
         
         # Load the custom config
-        with open(TEST_CONFIG_PATH, 'r') as f:
-            config = json.load(f)
+        config = loads_json(TEST_CONFIG_PATH.read_bytes())
         
         # Update port
         config["services"]["webserver"]["port"] = server.port
@@ -47,10 +45,11 @@ def fanarttv_server():
         config["services"]["cache"]["attribute_cache_path"] = str(attributes_cache_dir.absolute())
         config["services"]["cache"]["image_cache_path"] = str(images_cache_dir.absolute())
         
+        # Keep settings storage separate per pytest-xdist worker
+        server.isolate_worker_storage(config)
+        
         # Create config file
-        server.config_path = Path(f"test_config_{server.port}.json")
-        with open(server.config_path, 'w') as f:
-            json.dump(config, f, indent=2)
+        server.config_path = write_config_file(Path(f"test_config_{server.port}.json"), config)
         
         return server.config_path
     
@@ -70,8 +69,6 @@ def test_fanarttv_server_startup(fanarttv_server):
 
 def test_fanarttv_artist_coverart_beatles(fanarttv_server):
     """Test FanArt.tv artist cover art functionality with The Beatles"""
-    import base64
-    
     # Encode "The Beatles" for URL-safe transmission
     artist_name = "The Beatles"
     # Use URL-safe Base64 encoding without padding
@@ -103,7 +100,7 @@ def test_fanarttv_artist_coverart_beatles(fanarttv_server):
         
         # Check for both possible FanArt.tv provider names
         provider_name = result['provider']['name'] if isinstance(result['provider'], dict) else result['provider']
-        if provider_name.lower() in ['fanarttv', 'fanarttv_coverart', 'fanart.tv', 'fanart.tv cover art']:
+        if provider_name.lower() in FANARTTV_PROVIDER_NAMES:
             fanarttv_results.extend(result['images'])
             print(f"FanArt.tv provider found {len(result['images'])} images")
             for i, image in enumerate(result['images']):
@@ -131,8 +128,6 @@ def test_fanarttv_artist_coverart_beatles(fanarttv_server):
 
 def test_fanarttv_album_coverart_beatles(fanarttv_server):
     """Test FanArt.tv album cover art functionality with The Beatles albums"""
-    import base64
-    
     # Test both possible album names mentioned in the requirement
     test_cases = [
         ("The Beatles", "The Beastles"),  # As mentioned in the requirement (typo)
@@ -173,7 +168,7 @@ def test_fanarttv_album_coverart_beatles(fanarttv_server):
             
             # Check for both possible FanArt.tv provider names
             provider_name = result['provider']['name'] if isinstance(result['provider'], dict) else result['provider']
-            if provider_name.lower() in ['fanarttv', 'fanarttv_coverart', 'fanart.tv', 'fanart.tv cover art']:
+            if provider_name.lower() in FANARTTV_PROVIDER_NAMES:
                 fanarttv_results.extend(result['urls'])
                 print(f"FanArt.tv provider found {len(result['urls'])} URLs")
                 for i, url in enumerate(result['urls']):
@@ -236,7 +231,7 @@ def test_fanarttv_coverart_methods(fanarttv_server):
             provider_name = provider['name']
             print(f"  - {provider_name}")
             
-            if provider_name.lower() in ['fanarttv', 'fanarttv_coverart', 'fanart.tv', 'fanart.tv cover art']:
+            if provider_name.lower() in FANARTTV_PROVIDER_NAMES:
                 fanarttv_found = True
                 print(f"  ✓ FanArt.tv found in {method_name} method")
     
@@ -246,8 +241,6 @@ def test_fanarttv_coverart_methods(fanarttv_server):
 
 def test_fanarttv_john_williams(fanarttv_server):
     """Test FanArt.tv functionality with John Williams (same as TheAudioDB test)"""
-    import base64
-    
     # Test with John Williams - same artist as TheAudioDB test
     artist_name = "John Williams"
     artist_b64 = base64.urlsafe_b64encode(artist_name.encode('utf-8')).decode('utf-8').rstrip('=')
@@ -278,7 +271,7 @@ def test_fanarttv_john_williams(fanarttv_server):
         
         # Check for both possible FanArt.tv provider names
         provider_name = result['provider']['name'] if isinstance(result['provider'], dict) else result['provider']
-        if provider_name.lower() in ['fanarttv', 'fanarttv_coverart', 'fanart.tv', 'fanart.tv cover art']:
+        if provider_name.lower() in FANARTTV_PROVIDER_NAMES:
             fanarttv_results.extend(result['images'])
             print(f"FanArt.tv provider found {len(result['images'])} images")
             for i, image in enumerate(result['images']):
@@ -306,8 +299,6 @@ def test_fanarttv_john_williams(fanarttv_server):
 
 def test_fanarttv_coverart_integration_full_flow(fanarttv_server):
     """Full integration test for FanArt.tv cover art functionality"""
-    import base64
-    
     print("\n=== Full FanArt.tv Cover Art Integration Test ===")
     
     # Step 1: Check if FanArt.tv is available as a provider
@@ -318,7 +309,7 @@ def test_fanarttv_coverart_integration_full_flow(fanarttv_server):
     for method in methods_response['methods']:
         for provider in method['providers']:
             provider_name = provider['name'].lower()
-            if provider_name in ['fanarttv', 'fanarttv_coverart', 'fanart.tv', 'fanart.tv cover art']:
+            if provider_name in FANARTTV_PROVIDER_NAMES:
                 fanarttv_available = True
                 break
     
@@ -336,7 +327,7 @@ def test_fanarttv_coverart_integration_full_flow(fanarttv_server):
     artist_fanarttv_images = 0
     for result in artist_response['results']:
         provider_name = result['provider']['name'] if isinstance(result['provider'], dict) else result['provider']
-        if provider_name.lower() in ['fanarttv', 'fanarttv_coverart', 'fanart.tv', 'fanart.tv cover art']:
+        if provider_name.lower() in FANARTTV_PROVIDER_NAMES:
             artist_fanarttv_images += len(result['images'])
     
     print(f"Step 2: Artist '{artist_name}' - FanArt.tv images found: {artist_fanarttv_images}")
@@ -350,7 +341,7 @@ def test_fanarttv_coverart_integration_full_flow(fanarttv_server):
     album_fanarttv_images = 0
     for result in album_response['results']:
         provider_name = result['provider']['name'] if isinstance(result['provider'], dict) else result['provider']
-        if provider_name.lower() in ['fanarttv', 'fanarttv_coverart', 'fanart.tv', 'fanart.tv cover art']:
+        if provider_name.lower() in FANARTTV_PROVIDER_NAMES:
             album_fanarttv_images += len(result['images'])
     
     print(f"Step 3: Album '{album_name}' by '{artist_name}' - FanArt.tv images found: {album_fanarttv_images}")
@@ -376,22 +367,20 @@ def test_fanarttv_coverart_integration_full_flow(fanarttv_server):
 
 def test_fanarttv_rate_limiting(fanarttv_server):
     """Test that FanArt.tv handles multiple requests appropriately"""
-    import base64
-    
     # Make multiple requests quickly to test any caching or rate limiting
     artist_name = "The Beatles"
     artist_b64 = base64.urlsafe_b64encode(artist_name.encode('utf-8')).decode('utf-8').rstrip('=')
     
     try:
         # First request
-        start_time = time.time()
+        start_time = time.perf_counter()
         response1 = fanarttv_server.api_request('GET', f'/api/coverart/artist/{artist_b64}')
         assert response1 is not None
         assert 'results' in response1
         
         # Second request should also work and might be faster due to caching
         response2 = fanarttv_server.api_request('GET', f'/api/coverart/artist/{artist_b64}')
-        end_time = time.time()
+        end_time = time.perf_counter()
         
         assert response2 is not None
         assert 'results' in response2
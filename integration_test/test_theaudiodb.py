@@ -3,42 +3,61 @@
 TheAudioDB integration tests for AudioControl system
 """
 
+import logging
 import pytest
-import json
+import base64
+import copy
 import time
 import os
 from pathlib import Path
-from conftest import AudioControlTestServer, TEST_PORTS
+from concurrent.futures import ThreadPoolExecutor
+from conftest import AudioControlTestServer, TEST_PORTS, worker_port, loads_json, response_json, write_config_file
 
 # Test configuration for TheAudioDB
 TEST_CONFIG_PATH = Path(__file__).parent / "test_config_theaudiodb.json"
 
-@pytest.fixture
+# The config template doesn't change, so it is parsed only once
+with open(TEST_CONFIG_PATH, 'rb') as f:
+    BASE_CONFIG = loads_json(f.read())
+
+# John Williams' MBID and the lookup endpoint for it, shared by several tests
+JOHN_WILLIAMS_MBID = "53b106e7-0cc6-42cc-ac95-ed8d30a3a98e"
+JOHN_WILLIAMS_MBID_PATH = f"/api/audiodb/mbid/{JOHN_WILLIAMS_MBID}"
+INVALID_MBID = "invalid-mbid-12345"
+UNKNOWN_MBID = "00000000-0000-0000-0000-000000000000"
+
+logger = logging.getLogger(__name__)
+
+def urlsafe_b64(text: str) -> str:
+    """Encode a name for the cover art API: URL-safe Base64 without padding"""
+    return base64.urlsafe_b64encode(text.encode('utf-8')).decode('utf-8').rstrip('=')
+
+# Encoded artist and album names, computed once for all cover art tests
+BEATLES_B64 = urlsafe_b64("The Beatles")
+BEASTLES_B64 = urlsafe_b64("The Beastles")
+ABBEY_ROAD_B64 = urlsafe_b64("Abbey Road")
+
+@pytest.fixture(scope="module")
 def theaudiodb_server():
-    """Fixture for TheAudioDB integration tests"""
-    server = AudioControlTestServer("theaudiodb", TEST_PORTS['theaudiodb'])
+    """Fixture for TheAudioDB integration tests, the server is shared by the module"""
+    server = AudioControlTestServer("theaudiodb", worker_port(TEST_PORTS['theaudiodb']))
     
     # Override the config path to use our custom config
     original_create_config = server.create_config
     
     def create_custom_config():
         """Create config with TheAudioDB enabled"""
-        import tempfile
-        import shutil
-        
-        # Create cache directories
+        # Create cache directories, parents=True creates cache_dir along with the first one
         cache_dir = Path(f"test_cache_{server.port}")
-        cache_dir.mkdir(exist_ok=True)
         attributes_cache_dir = cache_dir / "attributes"
-        attributes_cache_dir.mkdir(exist_ok=True)
         images_cache_dir = cache_dir / "images"
-        images_cache_dir.mkdir(exist_ok=True)
+        attributes_cache_dir.mkdir(parents=True, exist_ok=True)
+        images_cache_dir.mkdir(parents=True, exist_ok=True)
         
         server.cache_dir = cache_dir
         
-        # Load the custom config
-        with open(TEST_CONFIG_PATH, 'r') as f:
-            config = json.load(f)
+        # Copy the custom config, the fixture changes it
+        config = copy.deepcopy(BASE_CONFIG)
         
         # Update port
         config["services"]["webserver"]["port"] = server.port
@@ -47,10 +66,11 @@ def theaudiodb_server():
         config["services"]["cache"]["attribute_cache_path"] = str(attributes_cache_dir.absolute())
         config["services"]["cache"]["image_cache_path"] = str(images_cache_dir.absolute())
         
+        # Keep settings storage separate per pytest-xdist worker
+        server.isolate_worker_storage(config)
+        
         # Create config file
-        server.config_path = Path(f"test_config_{server.port}.json")
-        with open(server.config_path, 'w') as f:
-            json.dump(config, f, indent=2)
+        server.config_path = write_config_file(Path(f"test_config_{server.port}.json"), config)
         
         return server.config_path
     
@@ -61,35 +81,88 @@ def theaudiodb_server():
     yield server
     server.stop_server()
 
+@pytest.fixture(scope="module")
+def mbid_lookups(theaudiodb_server):
+    """Raw responses of the MBID lookup endpoint, by MBID
+    
+    The lookups don't depend on each other, so they are sent at the same time
+    and shared by the tests that only check the result.
+    """
+    mbids = [JOHN_WILLIAMS_MBID, INVALID_MBID, UNKNOWN_MBID]
+    
+    def lookup(mbid):
+        return theaudiodb_server.api_request_with_error_handling('GET', f'/api/audiodb/mbid/{mbid}')
+    
+    with ThreadPoolExecutor(max_workers=len(mbids)) as executor:
+        return dict(zip(mbids, executor.map(lookup, mbids)))
+
+@pytest.fixture(scope="module")
+def theaudiodb_available(theaudiodb_server):
+    """Whether TheAudioDB is listed as a cover art provider
+    
+    Checked once per module, so the cover art tests can skip their lookups
+    when TheAudioDB is disabled.
+    """
+    response = theaudiodb_server.api_json('GET', '/api/coverart/methods')
+    assert 'methods' in response
+    return any(
+        provider['name'].lower() == 'theaudiodb'
+        for method in response['methods']
+        for provider in method['providers']
+    )
+
+@pytest.fixture(autouse=True)
+def skip_without_theaudiodb(request):
+    """Skip tests marked needs_theaudiodb before they make any upstream lookups"""
+    if request.node.get_closest_marker("needs_theaudiodb") and not request.getfixturevalue("theaudiodb_available"):
+        pytest.skip("TheAudioDB is not available as a cover art provider")
+
+def _assert_mbid_response(response_data, mbid):
+    """Check the structure every MBID lookup response shares"""
+    assert isinstance(response_data, dict)
+    assert 'mbid' in response_data
+    assert response_data['mbid'] == mbid
+    assert 'success' in response_data
+
+def _provider_name(result):
+    """Name of the provider of a cover art result, the provider may be an object or a plain name"""
+    return result['provider']['name'] if isinstance(result['provider'], dict) else result['provider']
+
+def _assert_coverart_response(response):
+    """Check the structure of a cover art lookup response and return its results"""
+    assert 'results' in response
+    results = response['results']
+    assert isinstance(results, list)
+    for result in results:
+        assert isinstance(result, dict)
+        assert 'provider' in result
+        assert 'images' in result
+        assert isinstance(result['images'], list)
+    return results
+
 def test_theaudiodb_server_startup(theaudiodb_server):
     """Test that the server starts up correctly with TheAudioDB enabled"""
     # The server should be running by now due to the fixture
-    response = theaudiodb_server.api_request('GET', '/api/version')
+    response = theaudiodb_server.api_json('GET', '/api/version')
     assert 'version' in response
     assert response['version'] is not None
 
-def test_theaudiodb_mbid_endpoint(theaudiodb_server):
+def test_theaudiodb_mbid_endpoint(mbid_lookups):
     """Test the TheAudioDB MBID lookup endpoint"""
     # Test with John Williams' MBID
-    mbid = "53b106e7-0cc6-42cc-ac95-ed8d30a3a98e"
+    mbid = JOHN_WILLIAMS_MBID
     
-    # Use the error-handling version of the API request
-    response = theaudiodb_server.api_request_with_error_handling('GET', f'/api/audiodb/mbid/{mbid}')
+    # Raw response, so the status code can be checked
+    response = mbid_lookups[mbid]
     
-    print(f"HTTP Status Code: {response.status_code}")
+    logger.debug("HTTP Status Code: %s", response.status_code)
     
     # Check if we got a successful response
     if response.status_code == 200:
-        response_data = response.json()
-        
-        # Check that we got a valid response
-        assert response_data is not None
-        assert isinstance(response_data, dict)
+        response_data = response_json(response)
         
         # Check the response structure
-        assert 'mbid' in response_data
-        assert response_data['mbid'] == mbid
-        assert 'success' in response_data
+        _assert_mbid_response(response_data, mbid)
         assert 'data' in response_data
         
         # If successful, check the data
@@ -102,13 +175,13 @@ def test_theaudiodb_mbid_endpoint(theaudiodb_server):
             assert 'strArtist' in artist_data
             assert artist_data['strArtist'] == 'John Williams'
             
-            print(f"Successfully retrieved artist: {artist_data['strArtist']}")
-            print(f"Artist biography length: {len(artist_data.get('strBiographyEN', ''))}")
+            logger.debug("Successfully retrieved artist: %s", artist_data['strArtist'])
+            logger.debug("Artist biography length: %s", len(artist_data.get('strBiographyEN', '')))
         else:
             # If not successful, check the error
             assert 'error' in response_data
             assert response_data['error'] is not None
-            print(f"API returned error: {response_data['error']}")
+            logger.debug("API returned error: %s", response_data['error'])
             # This is not expected - the test requires proper configuration
             if "disabled" in response_data['error'].lower():
                 raise AssertionError(f"TheAudioDB is disabled - this test requires TheAudioDB to be enabled: {response_data['error']}")
@@ -118,148 +191,100 @@ def test_theaudiodb_mbid_endpoint(theaudiodb_server):
     
     elif response.status_code == 503:
         # Service unavailable - TheAudioDB is disabled - this should fail the test
-        try:
-            error_response = response.json()
-            print(f"Service unavailable: {error_response}")
-            assert 'error' in error_response
-            raise AssertionError(f"TheAudioDB service is disabled - this test requires TheAudioDB to be enabled: {error_response['error']}")
-        except Exception as e:
-            raise AssertionError(f"TheAudioDB service is disabled - this test requires TheAudioDB to be enabled")
+        pytest.fail(f"TheAudioDB service is disabled - this test requires TheAudioDB to be enabled: {response.text}")
     
     elif response.status_code == 500:
         # Server error - could be API key issue or other problem
         try:
-            error_response = response.json()
-            print(f"Server error response: {error_response}")
-            
-            # Check the expected structure for our API
-            assert 'mbid' in error_response
-            assert error_response['mbid'] == mbid
-            assert 'success' in error_response
-            assert error_response['success'] is False
-            assert 'error' in error_response
-            
-            error_msg = error_response['error']
-            
-            # Check if it's an expected error (API key issues, network, etc.)
-            if ("your_theaudiodb_api_key_here" in error_msg or 
-                "status code 404" in error_msg or 
-                "Failed to send request" in error_msg):
-                raise AssertionError(f"TheAudioDB API key is not configured correctly: {error_msg}")
-            elif "disabled" in error_msg.lower():
-                raise AssertionError(f"TheAudioDB is disabled - this test requires TheAudioDB to be enabled: {error_msg}")
-            else:
-                raise AssertionError(f"Unexpected server error: {error_response}")
-                
-        except Exception as json_err:
-            print(f"Could not parse server error response: {json_err}")
-            raise AssertionError(f"HTTP 500 error with unparseable response")
+            error_response = response_json(response)
+        except ValueError as json_err:
+            pytest.fail(f"HTTP 500 error with unparseable response: {json_err}")
+        logger.debug("Server error response: %s", error_response)
+        
+        # Check the expected structure for our API
+        _assert_mbid_response(error_response, mbid)
+        assert error_response['success'] is False
+        assert 'error' in error_response
+        
+        error_msg = error_response['error']
+        
+        # Check if it's an expected error (API key issues, network, etc.)
+        if ("your_theaudiodb_api_key_here" in error_msg or 
+            "status code 404" in error_msg or 
+            "Failed to send request" in error_msg):
+            pytest.fail(f"TheAudioDB API key is not configured correctly: {error_msg}")
+        elif "disabled" in error_msg.lower():
+            pytest.fail(f"TheAudioDB is disabled - this test requires TheAudioDB to be enabled: {error_msg}")
+        else:
+            pytest.fail(f"Unexpected server error: {error_response}")
     
     else:
-        # Other HTTP errors
-        try:
-            error_response = response.json()
-            print(f"HTTP {response.status_code} error response: {error_response}")
-            raise AssertionError(f"Unexpected HTTP {response.status_code} error: {error_response}")
-        except Exception as json_err:
-            print(f"HTTP {response.status_code} error with unparseable response: {json_err}")
-            raise AssertionError(f"HTTP {response.status_code} error with unparseable response")
+        # Other HTTP errors, the body is only needed for the message
+        pytest.fail(f"Unexpected HTTP {response.status_code} error: {response.text}")
 
-def test_theaudiodb_mbid_endpoint_invalid(theaudiodb_server):
-    """Test the TheAudioDB MBID lookup endpoint with invalid MBID"""
-    # Test with an invalid MBID
-    mbid = "invalid-mbid-12345"
-    
-    try:
-        response = theaudiodb_server.api_request('GET', f'/api/audiodb/mbid/{mbid}')
-        # If we get here, check the response structure
-        assert response is not None
-        assert isinstance(response, dict)
-        assert 'mbid' in response
-        assert response['mbid'] == mbid
-        assert 'success' in response
-        
-        # For invalid MBID, success should be False
-        assert response['success'] is False
-        assert 'error' in response
-        assert response['error'] is not None
-        
-        print(f"Expected error for invalid MBID: {response['error']}")
-            
-    except Exception as e:
-        # It's also acceptable if the API returns an HTTP error
-        print(f"API returned HTTP error for invalid MBID (expected): {e}")
-
-def test_theaudiodb_mbid_endpoint_unknown_artist(theaudiodb_server):
-    """Test the TheAudioDB MBID lookup endpoint with unknown but valid MBID"""
-    # Test with a valid but unknown MBID format
-    mbid = "00000000-0000-0000-0000-000000000000"
-    
-    try:
-        response = theaudiodb_server.api_request('GET', f'/api/audiodb/mbid/{mbid}')
-        
-        # Check that we got a valid response
-        assert response is not None
-        assert isinstance(response, dict)
-        assert 'mbid' in response
-        assert response['mbid'] == mbid
-        assert 'success' in response
-        
-        # For unknown MBID, success should be False
-        assert response['success'] is False
-        assert 'error' in response
-        assert response['error'] is not None
-        
-        print(f"Expected error for unknown MBID: {response['error']}")
-        
-    except Exception as e:
-        # It's also acceptable if the API returns an HTTP error (404)
-        print(f"API returned HTTP error for unknown MBID (expected): {e}")
+@pytest.mark.parametrize("mbid", [
+    # Not an MBID at all
+    pytest.param(INVALID_MBID, id="invalid"),
+    # A valid MBID format that no artist has
+    pytest.param(UNKNOWN_MBID, id="unknown_artist"),
+])
+def test_theaudiodb_mbid_endpoint_lookup_fails(mbid_lookups, mbid):
+    """Test the TheAudioDB MBID lookup endpoint with MBIDs that don't resolve to an artist"""
+    response = mbid_lookups[mbid]
+    if response.status_code >= 400:
+        # It's also acceptable if the API returns an HTTP error (e.g. 404)
+        logger.debug("API returned HTTP %s for MBID %s (expected)", response.status_code, mbid)
+        return
+    
+    response = response_json(response)
+    _assert_mbid_response(response, mbid)
+    
+    # The lookup should fail
+    assert response['success'] is False
+    assert 'error' in response
+    assert response['error'] is not None
+    
+    logger.debug("Expected error for MBID %s: %s", mbid, response['error'])
 
+@pytest.mark.slow
 def test_theaudiodb_rate_limiting(theaudiodb_server):
     """Test that TheAudioDB rate limiting is working"""
     # Make multiple requests quickly to test rate limiting
-    mbid = "53b106e7-0cc6-42cc-ac95-ed8d30a3a98e"
-    
     try:
         # First request should succeed (or fail with service disabled)
-        start_time = time.time()
-        response1 = theaudiodb_server.api_request('GET', f'/api/audiodb/mbid/{mbid}')
-        assert response1 is not None
+        start_time = time.perf_counter()
+        response1 = theaudiodb_server.api_json('GET', JOHN_WILLIAMS_MBID_PATH)
         assert 'success' in response1
         
         # Second request should also work but might be slower due to rate limiting
-        response2 = theaudiodb_server.api_request('GET', f'/api/audiodb/mbid/{mbid}')
-        end_time = time.time()
+        response2 = theaudiodb_server.api_json('GET', JOHN_WILLIAMS_MBID_PATH)
+        end_time = time.perf_counter()
         
-        assert response2 is not None
         assert 'success' in response2
         
         # The two requests should take at least the rate limit time (500ms)
         # But we allow some margin for test execution time
         duration = end_time - start_time
-        print(f"Two API requests took {duration:.3f} seconds")
+        logger.debug("Two API requests took %.3f seconds", duration)
         
         # This is more of an informational test - rate limiting might be hard to test
         # in a reliable way due to caching and other factors
         
     except Exception as e:
         # It's acceptable if the service is disabled
-        print(f"Rate limiting test failed (expected if service is disabled): {e}")
+        logger.debug("Rate limiting test failed (expected if service is disabled): %s", e)
     
-def test_theaudiodb_endpoint_integration(theaudiodb_server):
+def test_theaudiodb_endpoint_integration(mbid_lookups):
     """Integration test for TheAudioDB endpoint functionality"""
     # Test the full flow: request -> processing -> response
-    mbid = "53b106e7-0cc6-42cc-ac95-ed8d30a3a98e"
+    mbid = JOHN_WILLIAMS_MBID
     
-    response = theaudiodb_server.api_request('GET', f'/api/audiodb/mbid/{mbid}')
+    response = mbid_lookups[mbid]
+    response.raise_for_status()
+    response = response_json(response)
     
     # Verify response structure
-    assert response is not None
-    assert isinstance(response, dict)
-    assert 'mbid' in response
-    assert response['mbid'] == mbid
-    assert 'success' in response
+    _assert_mbid_response(response, mbid)
     
     # Check the result
     if response['success']:
@@ -272,64 +297,54 @@ def test_theaudiodb_endpoint_integration(theaudiodb_server):
         assert 'strArtist' in artist_data
         assert artist_data['strArtist'] == 'John Williams'
         
-        # Check optional fields that might be present
+        # Log optional fields that might be present, only if anyone will see them
         optional_fields = ['strBiographyEN', 'strGenre', 'strCountry', 'strWebsite']
-        for field in optional_fields:
-            if field in artist_data:
-                print(f"{field}: {artist_data[field][:100] if isinstance(artist_data[field], str) else artist_data[field]}")
+        if logger.isEnabledFor(logging.DEBUG):
+            for field in optional_fields:
+                if field in artist_data:
+                    logger.debug("%s: %s", field, artist_data[field][:100] if isinstance(artist_data[field], str) else artist_data[field])
         
-        print(f"Integration test passed - successfully retrieved {artist_data['strArtist']}")
+        logger.debug("Integration test passed - successfully retrieved %s", artist_data['strArtist'])
     else:
         # If not successful, check the error
         assert 'error' in response
         assert response['error'] is not None
-        print(f"Integration test completed with expected error: {response['error']}")
+        logger.debug("Integration test completed with expected error: %s", response['error'])
         # This is expected if TheAudioDB is disabled or API key is missing
         if "disabled" in response['error'].lower():
-            print("TheAudioDB is disabled - this is expected in test environment")
+            logger.debug("TheAudioDB is disabled - this is expected in test environment")
         else:
             # Re-raise the error if it's not a disabled service
             raise AssertionError(f"Unexpected error: {response['error']}")
 
+@pytest.mark.needs_theaudiodb
 def test_theaudiodb_artist_coverart_beatles(theaudiodb_server):
     """Test TheAudioDB artist cover art functionality with The Beatles"""
-    import base64
-    
-    # Encode "The Beatles" for URL-safe transmission
     artist_name = "The Beatles"
-    # Use URL-safe Base64 encoding without padding
-    artist_b64 = base64.urlsafe_b64encode(artist_name.encode('utf-8')).decode('utf-8').rstrip('=')
+    artist_b64 = BEATLES_B64
     
-    print(f"Testing artist cover art for: {artist_name}")
-    print(f"URL-safe Base64 encoded: {artist_b64}")
+    logger.debug("Testing artist cover art for: %s", artist_name)
+    logger.debug("URL-safe Base64 encoded: %s", artist_b64)
     
     # Make request to the cover art API
-    response = theaudiodb_server.api_request('GET', f'/api/coverart/artist/{artist_b64}')
+    response = theaudiodb_server.api_json('GET', f'/api/coverart/artist/{artist_b64}')
     
     # Verify response structure
-    assert response is not None
-    assert isinstance(response, dict)
-    assert 'results' in response
-    assert isinstance(response['results'], list)
+    results = _assert_coverart_response(response)
     
     # Check if we got any results
-    results = response['results']
-    print(f"Found {len(results)} cover art results for {artist_name}")
+    logger.debug("Found %s cover art results for %s", len(results), artist_name)
     
     # Look for TheAudioDB results specifically
     theaudiodb_results = []
     for result in results:
-        assert isinstance(result, dict)
-        assert 'provider' in result
-        assert 'images' in result
-        assert isinstance(result['images'], list)
-        
-        provider_name = result['provider']['name'] if isinstance(result['provider'], dict) else result['provider']
+        provider_name = _provider_name(result)
         if provider_name == 'theaudiodb':
             theaudiodb_results.extend(result['images'])
-            print(f"TheAudioDB provider found {len(result['images'])} images")
-            for i, image in enumerate(result['images']):
-                print(f"  Image {i+1}: {image.get('url', 'No URL')} (Grade: {image.get('grade', 'No grade')})")
+            logger.debug("TheAudioDB provider found %s images", len(result['images']))
+            if logger.isEnabledFor(logging.DEBUG):
+                for i, image in enumerate(result['images']):
+                    logger.debug("  Image %s: %s (Grade: %s)", i+1, image.get('url', 'No URL'), image.get('grade', 'No grade'))
     
     # We should have TheAudioDB results for The Beatles (if service is enabled and configured)
     if theaudiodb_results:
@@ -338,67 +353,59 @@ def test_theaudiodb_artist_coverart_beatles(theaudiodb_server):
             assert 'url' in image, f"Image object missing URL: {image}"
             assert image['url'].startswith('http'), f"Invalid URL format: {image['url']}"
         
-        print(f"✓ Successfully found {len(theaudiodb_results)} TheAudioDB cover art images for {artist_name}")
+        logger.debug("✓ Successfully found %s TheAudioDB cover art images for %s", len(theaudiodb_results), artist_name)
     else:
         # If no results, the service might be disabled or misconfigured
-        print(f"⚠ No TheAudioDB results found for {artist_name}")
-        print("This might be expected if TheAudioDB is disabled or API key is missing")
+        logger.debug("⚠ No TheAudioDB results found for %s", artist_name)
+        logger.debug("This might be expected if TheAudioDB is disabled or API key is missing")
         
         # Don't fail the test if other providers found results
         total_images = sum(len(result['images']) for result in results)
         if total_images > 0:
-            print(f"Other providers found {total_images} images total")
+            logger.debug("Other providers found %s images total", total_images)
         else:
-            print("No cover art found from any provider")
+            logger.debug("No cover art found from any provider")
 
+@pytest.mark.needs_theaudiodb
 def test_theaudiodb_album_coverart_beatles(theaudiodb_server):
     """Test TheAudioDB album cover art functionality with The Beatles albums"""
-    import base64
-    
-    # Test both possible album names mentioned in the requirement
+    # Test both possible album names mentioned in the requirement, with their encoded names
     test_cases = [
-        ("The Beatles", "The Beastles"),  # As mentioned in the requirement
-        ("The Beatles", "The Beatles"),   # Correct album name
-        ("The Beatles", "Abbey Road"),    # Another famous Beatles album
+        ("The Beatles", "The Beastles", BEATLES_B64, BEASTLES_B64),  # As mentioned in the requirement
+        ("The Beatles", "The Beatles", BEATLES_B64, BEATLES_B64),    # Correct album name
+        ("The Beatles", "Abbey Road", BEATLES_B64, ABBEY_ROAD_B64),  # Another famous Beatles album
     ]
     
-    for artist_name, album_name in test_cases:
-        print(f"\nTesting album cover art for: '{album_name}' by '{artist_name}'")
-        
-        # Encode for URL-safe transmission using URL-safe Base64 without padding
-        artist_b64 = base64.urlsafe_b64encode(artist_name.encode('utf-8')).decode('utf-8').rstrip('=')
-        album_b64 = base64.urlsafe_b64encode(album_name.encode('utf-8')).decode('utf-8').rstrip('=')
-        
-        print(f"Artist URL-safe B64: {artist_b64}")
-        print(f"Album URL-safe B64: {album_b64}")
+    def lookup(test_case):
+        _, _, artist_b64, album_b64 = test_case
+        return theaudiodb_server.api_json('GET', f'/api/coverart/album/{album_b64}/{artist_b64}')
+    
+    # The lookups don't depend on each other, so make them at the same time
+    with ThreadPoolExecutor(max_workers=len(test_cases)) as executor:
+        responses = list(executor.map(lookup, test_cases))
+    
+    for (artist_name, album_name, artist_b64, album_b64), response in zip(test_cases, responses):
+        logger.debug("Testing album cover art for: '%s' by '%s'", album_name, artist_name)
         
-        # Make request to the album cover art API
-        response = theaudiodb_server.api_request('GET', f'/api/coverart/album/{album_b64}/{artist_b64}')
+        logger.debug("Artist URL-safe B64: %s", artist_b64)
+        logger.debug("Album URL-safe B64: %s", album_b64)
         
         # Verify response structure
-        assert response is not None
-        assert isinstance(response, dict)
-        assert 'results' in response
-        assert isinstance(response['results'], list)
+        results = _assert_coverart_response(response)
         
         # Check if we got any results
-        results = response['results']
-        print(f"Found {len(results)} cover art results for '{album_name}' by '{artist_name}'")
+        logger.debug("Found %s cover art results for '%s' by '%s'", len(results), album_name, artist_name)
         
         # Look for TheAudioDB results specifically
         theaudiodb_results = []
         for result in results:
-            assert isinstance(result, dict)
-            assert 'provider' in result
-            assert 'images' in result
-            assert isinstance(result['images'], list)
-            
-            provider_name = result['provider']['name'] if isinstance(result['provider'], dict) else result['provider']
+            provider_name = _provider_name(result)
             if provider_name == 'theaudiodb':
                 theaudiodb_results.extend(result['images'])
-                print(f"TheAudioDB provider found {len(result['images'])} images")
-                for i, image in enumerate(result['images']):
-                    print(f"  Image {i+1}: {image.get('url', 'No URL')} (Grade: {image.get('grade', 'No grade')})")
+                logger.debug("TheAudioDB provider found %s images", len(result['images']))
+                if logger.isEnabledFor(logging.DEBUG):
+                    for i, image in enumerate(result['images']):
+                        logger.debug("  Image %s: %s (Grade: %s)", i+1, image.get('url', 'No URL'), image.get('grade', 'No grade'))
         
         # Check results
         if theaudiodb_results:
@@ -407,38 +414,36 @@ def test_theaudiodb_album_coverart_beatles(theaudiodb_server):
                 assert 'url' in image, f"Image object missing URL: {image}"
                 assert image['url'].startswith('http'), f"Invalid URL format: {image['url']}"
             
-            print(f"✓ Successfully found {len(theaudiodb_results)} TheAudioDB album cover art images")
+            logger.debug("✓ Successfully found %s TheAudioDB album cover art images", len(theaudiodb_results))
             
             # For "Abbey Road", we should definitely find results if the service is working
             if album_name == "Abbey Road" and len(theaudiodb_results) > 0:
-                print(f"✓ Abbey Road test passed - TheAudioDB is working correctly")
+                logger.debug("✓ Abbey Road test passed - TheAudioDB is working correctly")
                 
         else:
             # If no TheAudioDB results, check if other providers found anything
             total_images = sum(len(result['images']) for result in results)
             if total_images > 0:
-                print(f"⚠ No TheAudioDB results, but other providers found {total_images} images")
+                logger.debug("⚠ No TheAudioDB results, but other providers found %s images", total_images)
             else:
-                print(f"⚠ No cover art found for '{album_name}' by '{artist_name}' from any provider")
+                logger.debug("⚠ No cover art found for '%s' by '%s' from any provider", album_name, artist_name)
             
             # This might be expected for "The Beastles" (typo) or if service is disabled
             if album_name == "The Beastles":
-                print("Note: 'The Beastles' appears to be a typo and may not exist in TheAudioDB")
+                logger.debug("Note: 'The Beastles' appears to be a typo and may not exist in TheAudioDB")
 
 def test_theaudiodb_coverart_methods(theaudiodb_server):
     """Test that TheAudioDB is listed as an available cover art provider"""
     
     # Get the list of available cover art methods
-    response = theaudiodb_server.api_request('GET', '/api/coverart/methods')
+    response = theaudiodb_server.api_json('GET', '/api/coverart/methods')
     
     # Verify response structure
-    assert response is not None
-    assert isinstance(response, dict)
     assert 'methods' in response
     assert isinstance(response['methods'], list)
     
     methods = response['methods']
-    print(f"Found {len(methods)} cover art methods")
+    logger.debug("Found %s cover art methods", len(methods))
     
     # Check each method
     theaudiodb_found = False
@@ -451,84 +456,64 @@ def test_theaudiodb_coverart_methods(theaudiodb_server):
         method_name = method['method']
         providers = method['providers']
         
-        print(f"Method '{method_name}' has {len(providers)} providers:")
+        logger.debug("Method '%s' has %s providers:", method_name, len(providers))
         for provider in providers:
             assert isinstance(provider, dict)
             assert 'name' in provider
             provider_name = provider['name']
-            print(f"  - {provider_name}")
+            logger.debug("  - %s", provider_name)
             
             if provider_name.lower() == 'theaudiodb':
                 theaudiodb_found = True
-                print(f"  ✓ TheAudioDB found in {method_name} method")
+                logger.debug("  ✓ TheAudioDB found in %s method", method_name)
     
     if theaudiodb_found:
-        print("✓ TheAudioDB is properly registered as a cover art provider")
+        logger.debug("✓ TheAudioDB is properly registered as a cover art provider")
     else:
-        print("⚠ TheAudioDB not found in cover art providers")
-        print("This might be expected if TheAudioDB is disabled or not configured")
+        logger.debug("⚠ TheAudioDB not found in cover art providers")
+        logger.debug("This might be expected if TheAudioDB is disabled or not configured")
 
+@pytest.mark.needs_theaudiodb
 def test_theaudiodb_coverart_integration_full_flow(theaudiodb_server):
     """Full integration test for TheAudioDB cover art functionality"""
-    import base64
-    
-    print("\n=== Full TheAudioDB Cover Art Integration Test ===")
-    
-    # Step 1: Check if TheAudioDB is available as a provider
-    methods_response = theaudiodb_server.api_request('GET', '/api/coverart/methods')
-    assert 'methods' in methods_response
+    # Step 1: TheAudioDB is available as a provider, the test is skipped otherwise
+    logger.debug("=== Full TheAudioDB Cover Art Integration Test ===")
     
-    theaudiodb_available = False
-    for method in methods_response['methods']:
-        for provider in method['providers']:
-            if provider['name'].lower() == 'theaudiodb':
-                theaudiodb_available = True
-                break
+    artist_name = "The Beatles"
+    artist_b64 = BEATLES_B64
+    album_name = "Abbey Road"
+    album_b64 = ABBEY_ROAD_B64
     
-    print(f"Step 1: TheAudioDB provider available: {theaudiodb_available}")
+    # The requests don't depend on each other, so send them at the same time
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        artist_future = executor.submit(theaudiodb_server.api_json, 'GET', f'/api/coverart/artist/{artist_b64}')
+        album_future = executor.submit(theaudiodb_server.api_json, 'GET', f'/api/coverart/album/{album_b64}/{artist_b64}')
+        artist_response = artist_future.result()
+        album_response = album_future.result()
     
     # Step 2: Test artist cover art with The Beatles
-    artist_name = "The Beatles"
-    artist_b64 = base64.urlsafe_b64encode(artist_name.encode('utf-8')).decode('utf-8').rstrip('=')
-    artist_response = theaudiodb_server.api_request('GET', f'/api/coverart/artist/{artist_b64}')
+    artist_results = _assert_coverart_response(artist_response)
+    artist_theaudiodb_urls = sum(len(result['images']) for result in artist_results if _provider_name(result).lower() == 'theaudiodb')
     
-    assert 'results' in artist_response
-    artist_theaudiodb_urls = 0
-    for result in artist_response['results']:
-        if result['provider'] == 'theaudiodb':
-            artist_theaudiodb_urls += len(result['urls'])
-    
-    print(f"Step 2: Artist '{artist_name}' - TheAudioDB URLs found: {artist_theaudiodb_urls}")
+    logger.debug("Step 2: Artist '%s' - TheAudioDB URLs found: %s", artist_name, artist_theaudiodb_urls)
     
     # Step 3: Test album cover art with Abbey Road
-    album_name = "Abbey Road"
-    album_b64 = base64.urlsafe_b64encode(album_name.encode('utf-8')).decode('utf-8').rstrip('=')
-    album_response = theaudiodb_server.api_request('GET', f'/api/coverart/album/{album_b64}/{artist_b64}')
+    album_results = _assert_coverart_response(album_response)
+    album_theaudiodb_urls = sum(len(result['images']) for result in album_results if _provider_name(result).lower() == 'theaudiodb')
     
-    assert 'results' in album_response
-    album_theaudiodb_urls = 0
-    for result in album_response['results']:
-        if result['provider'] == 'theaudiodb':
-            album_theaudiodb_urls += len(result['urls'])
-    
-    print(f"Step 3: Album '{album_name}' by '{artist_name}' - TheAudioDB URLs found: {album_theaudiodb_urls}")
+    logger.debug("Step 3: Album '%s' by '%s' - TheAudioDB URLs found: %s", album_name, artist_name, album_theaudiodb_urls)
     
     # Step 4: Summary
     total_urls = artist_theaudiodb_urls + album_theaudiodb_urls
-    print(f"\n=== Integration Test Summary ===")
-    print(f"TheAudioDB provider available: {theaudiodb_available}")
-    print(f"Total URLs found: {total_urls}")
-    print(f"  - Artist URLs: {artist_theaudiodb_urls}")
-    print(f"  - Album URLs: {album_theaudiodb_urls}")
-    
-    if theaudiodb_available and total_urls > 0:
-        print("✓ TheAudioDB cover art integration is working correctly")
-    elif theaudiodb_available and total_urls == 0:
-        print("⚠ TheAudioDB is available but returned no results")
-        print("This might indicate API key issues or network problems")
-    elif not theaudiodb_available:
-        print("⚠ TheAudioDB provider is not available")
-        print("This is expected if TheAudioDB is disabled in configuration")
-    
-    # Don't fail the test if the service is disabled - that's a valid configuration
-    print("Integration test completed successfully")
+    logger.debug("=== Integration Test Summary ===")
+    logger.debug("Total URLs found: %s", total_urls)
+    logger.debug("  - Artist URLs: %s", artist_theaudiodb_urls)
+    logger.debug("  - Album URLs: %s", album_theaudiodb_urls)
+    
+    if total_urls > 0:
+        logger.debug("✓ TheAudioDB cover art integration is working correctly")
+    else:
+        logger.debug("⚠ TheAudioDB is available but returned no results")
+        logger.debug("This might indicate API key issues or network problems")
+    
+    logger.debug("Integration test completed successfully")
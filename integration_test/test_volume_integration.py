@@ -6,11 +6,18 @@ These tests use the dummy volume control to test all volume endpoints and event
 
 import pytest
 import json
+import queue
 import time
 import requests
 import websocket
 import threading
 from typing import Dict, List, Any, Optional
+from conftest import AudioControlTestServer, TEST_PORTS, worker_port
+
+
+def is_volume_event(event: Dict) -> bool:
+    """Check if a WebSocket event is a volume change, directly or wrapped in event_data"""
+    return event.get("type") == "volume_changed" or event.get("event_data", {}).get("type") == "volume_changed"
 
 
 class VolumeTestHelper:
@@ -19,6 +26,8 @@ class VolumeTestHelper:
     def __init__(self, server):
         self.server = server
         self.websocket_events = []
+        # Volume change events are also queued, so waiting for one doesn't need polling
+        self.volume_events: queue.Queue = queue.Queue()
         self.websocket_connection = None
         self.websocket_thread = None
         
@@ -28,6 +37,8 @@ class VolumeTestHelper:
             try:
                 event = json.loads(message)
                 self.websocket_events.append(event)
+                if is_volume_event(event):
+                    self.volume_events.put(event)
                 print(f"WebSocket received: {event}")
             except json.JSONDecodeError:
                 print(f"Failed to parse WebSocket message: {message}")
@@ -77,27 +88,24 @@ class VolumeTestHelper:
     def clear_events(self):
         """Clear accumulated WebSocket events"""
         self.websocket_events.clear()
+        while True:
+            try:
+                self.volume_events.get_nowait()
+            except queue.Empty:
+                break
     
     def wait_for_volume_event(self, timeout=5.0) -> Optional[Dict]:
-        """Wait for a volume change event"""
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            for event in self.websocket_events:
-                # Check if it's a volume change event directly
-                if event.get("type") == "volume_changed":
-                    return event
-                # Also check if it's wrapped in event_data
-                if event.get("event_data", {}).get("type") == "volume_changed":
-                    return event
-            time.sleep(0.1)
-        return None
+        """Wait for the next volume change event, returns None on timeout"""
+        try:
+            return self.volume_events.get(timeout=timeout)
+        except queue.Empty:
+            return None
 
 
 @pytest.fixture
 def volume_server(request):
     """Fixture to start the server with volume control configuration"""
-    from conftest import AudioControlTestServer
-    server = AudioControlTestServer("volume", 18080)
+    server = AudioControlTestServer("volume", worker_port(TEST_PORTS['volume']))
     
     try:
         success = server.start_server()
@@ -434,13 +442,7 @@ def test_volume_event_subscription(volume_server, volume_helper):
         time.sleep(0.5)  # Allow time for event propagation
     
     # Should have received multiple volume change events
-    volume_events = []
-    for event in volume_helper.websocket_events:
-        # Check both direct and wrapped event formats
-        if event.get("type") == "volume_changed":
-            volume_events.append(event)
-        elif event.get("event_data", {}).get("type") == "volume_changed":
-            volume_events.append(event)
+    volume_events = [event for event in volume_helper.websocket_events if is_volume_event(event)]
     
     assert len(volume_events) >= len(changes), f"Expected at least {len(changes)} events, got {len(volume_events)}"
     
@@ -11,6 +11,9 @@ use rocket::futures::{SinkExt, StreamExt};
 use crate::data::PlayerEvent;
 use crate::audiocontrol::eventbus::EventBus;
 
+/// How often queued events are pushed to connected WebSocket clients
+const EVENT_PUSH_INTERVAL: Duration = Duration::from_millis(100);
+
 /// New format for WebSocket messages with source at top level
 #[derive(Debug, Clone, Serialize)]
 struct WebSocketMessage {
@@ -521,7 +524,7 @@ pub fn event_messages(ws: WebSocket, ws_manager: &rocket::State<Arc<WebSocketMan
             }
             
             // Create a polling interval
-            let mut interval = tokio::time::interval(tokio::time::Duration::from_millis(500));
+            let mut interval = tokio::time::interval(EVENT_PUSH_INTERVAL);
             
             loop {
                 tokio::select! {
@@ -650,7 +653,7 @@ pub fn player_event_messages(ws: WebSocket, player_name: &str, ws_manager: &rock
             }
             
             // Create a polling interval
-            let mut interval = tokio::time::interval(tokio::time::Duration::from_millis(500));
+            let mut interval = tokio::time::interval(EVENT_PUSH_INTERVAL);
             
             loop {
                 tokio::select! {
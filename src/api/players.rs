@@ -119,6 +119,7 @@ pub struct NowPlayingResponse {
     shuffle: bool,
     loop_mode: LoopMode,
     position: Option<f64>, // Current playback position in seconds
+    position_timestamp: i64, // Server time (Unix milliseconds) at which the position was read
 }
 
 /// Response struct for the player queue
@@ -187,8 +188,11 @@ pub fn get_current_player(controller: &State<Arc<AudioController>>) -> Json<Curr
 }
 
 /// List all available players
-#[get("/players")]
-pub fn list_players(controller: &State<Arc<AudioController>>) -> Json<PlayersListResponse> {
+///
+/// If kind is given, only players whose name matches it or whose id contains it
+/// (case-insensitive) are returned.
+#[get("/players?<kind>")]
+pub fn list_players(kind: Option<String>, controller: &State<Arc<AudioController>>) -> Json<PlayersListResponse> {
     let audio_controller = controller.inner();
     let controllers = audio_controller.list_controllers();
     
@@ -197,7 +201,7 @@ pub fn list_players(controller: &State<Arc<AudioController>>) -> Json<PlayersLis
     let current_player_name = audio_controller.get_player_name();
     let current_player_id = audio_controller.get_player_id();
     
-    let players_info: Vec<PlayerInfo> = controllers.iter()
+    let mut players_info: Vec<PlayerInfo> = controllers.iter()
         .map(|ctrl_lock| {
             if let Ok(ctrl) = ctrl_lock.read() {
                 let name = ctrl.get_player_name();
@@ -242,6 +246,14 @@ pub fn list_players(controller: &State<Arc<AudioController>>) -> Json<PlayersLis
         })
         .collect();
     
+    // Only return players of the requested kind
+    if let Some(kind) = kind {
+        let kind = kind.to_lowercase();
+        players_info.retain(|player| {
+            player.name.to_lowercase() == kind || player.id.to_lowercase().contains(&kind)
+        });
+    }
+    
     Json(PlayersListResponse {
         players: players_info,
     })
@@ -391,6 +403,7 @@ pub fn get_now_playing(controller: &State<Arc<AudioController>>) -> Json<NowPlay
         shuffle: false,
         loop_mode: LoopMode::None,
         position: None,
+        position_timestamp: chrono::Utc::now().timestamp_millis(),
     };
 
     // Get the audio controller safely
@@ -425,6 +438,7 @@ pub fn get_now_playing(controller: &State<Arc<AudioController>>) -> Json<NowPlay
     let shuffle = player.get_shuffle();
     let loop_mode = player.get_loop_mode();
     let position = player.get_position();
+    let position_timestamp = chrono::Utc::now().timestamp_millis();
     
     // Format last_seen timestamp if available
     let last_seen = player.get_last_seen()
@@ -452,6 +466,7 @@ pub fn get_now_playing(controller: &State<Arc<AudioController>>) -> Json<NowPlay
         shuffle,
         loop_mode,
         position,
+        position_timestamp,
     })
 }
 
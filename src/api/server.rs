@@ -6,7 +6,7 @@ use crate::api::{
 use crate::api::events::WebSocketManager;
 use crate::config::get_service_config;
 use crate::constants::API_PREFIX;
-use crate::players::{player_event_update};
+use crate::players::{player_event_update, player_events_batch};
  
 use log::{info, warn};
 use rocket::{routes, get};
@@ -105,6 +105,7 @@ pub async fn start_rocket_server(controller: Arc<AudioController>, config_json:
         
         // Generic player API endpoints
         player_event_update,
+        player_events_batch,
     ];
 
     // Define volume routes
@@ -196,6 +197,7 @@ pub async fn start_rocket_server(controller: Arc<AudioController>, config_json:
     let settings_routes = routes![
         settings::get_setting,
         settings::set_setting,
+        settings::settings_batch,
     ];
     
     // Cache routes
@@ -35,6 +35,27 @@ pub struct SetSettingResponse {
     pub previous_value: Option<serde_json::Value>,
 }
 
+/// A single operation of a settings batch request
+#[derive(Deserialize, Serialize)]
+#[serde(tag = "op", rename_all = "lowercase")]
+pub enum SettingOperation {
+    Get { key: String },
+    Set { key: String, value: serde_json::Value },
+}
+
+/// Request structure for running several operations in one request
+#[derive(Deserialize, Serialize)]
+pub struct SettingsBatchRequest {
+    pub operations: Vec<SettingOperation>,
+}
+
+/// Response structure for batch operations
+#[derive(Serialize, Deserialize)]
+pub struct SettingsBatchResponse {
+    pub success: bool,
+    pub results: Vec<serde_json::Value>,
+}
+
 /// Response structure for error operations
 #[derive(Serialize, Deserialize)]
 pub struct ErrorResponse {
@@ -48,29 +69,34 @@ pub struct ErrorResponse {
 /// Uses POST method to handle non-ASCII characters in keys properly.
 #[post("/get", data = "<request>")]
 pub fn get_setting(request: Json<GetSettingRequest>) -> Json<serde_json::Value> {
-    debug!("Getting setting for key: {}", request.key);
+    Json(get_setting_value(&request.key))
+}
+
+/// Look up a setting and build the response of the get endpoint
+fn get_setting_value(key: &str) -> serde_json::Value {
+    debug!("Getting setting for key: {}", key);
     
     // Try to get the value from the settings database
-    match settingsdb::get::<serde_json::Value>(&request.key) {
+    match settingsdb::get::<serde_json::Value>(key) {
         Ok(value_opt) => {
             let exists = value_opt.is_some();
             let response = GetSettingResponse {
                 success: true,
-                key: request.key.clone(),
+                key: key.to_string(),
                 value: value_opt,
                 exists,
             };
             
-            debug!("Successfully retrieved setting '{}', exists: {}", request.key, exists);
-            Json(serde_json::to_value(response).unwrap())
+            debug!("Successfully retrieved setting '{}', exists: {}", key, exists);
+            serde_json::to_value(response).unwrap()
         }
         Err(e) => {
-            error!("Failed to get setting '{}': {}", request.key, e);
+            error!("Failed to get setting '{}': {}", key, e);
             let response = ErrorResponse {
                 success: false,
                 message: format!("Failed to get setting: {}", e),
             };
-            Json(serde_json::to_value(response).unwrap())
+            serde_json::to_value(response).unwrap()
         }
     }
 }
@@ -81,40 +107,65 @@ pub fn get_setting(request: Json<GetSettingRequest>) -> Json<serde_json::Value>
 /// Returns the previous value if it existed.
 #[post("/set", data = "<request>")]
 pub fn set_setting(request: Json<SetSettingRequest>) -> Json<serde_json::Value> {
-    debug!("Setting value for key: {} = {:?}", request.key, request.value);
+    Json(set_setting_value(&request.key, &request.value))
+}
+
+/// Store a setting and build the response of the set endpoint
+fn set_setting_value(key: &str, value: &serde_json::Value) -> serde_json::Value {
+    debug!("Setting value for key: {} = {:?}", key, value);
     
     // First, try to get the current value to return as previous_value
-    let previous_value = match settingsdb::get::<serde_json::Value>(&request.key) {
+    let previous_value = match settingsdb::get::<serde_json::Value>(key) {
         Ok(value_opt) => value_opt,
         Err(e) => {
-            warn!("Could not retrieve previous value for key '{}': {}", request.key, e);
+            warn!("Could not retrieve previous value for key '{}': {}", key, e);
             None
         }
     };
     
     // Try to set the new value
-    match settingsdb::set(&request.key, &request.value) {
+    match settingsdb::set(key, value) {
         Ok(()) => {
-            debug!("Successfully set setting '{}' to {:?}", request.key, request.value);
+            debug!("Successfully set setting '{}' to {:?}", key, value);
             let response = SetSettingResponse {
                 success: true,
-                key: request.key.clone(),
-                value: request.value.clone(),
+                key: key.to_string(),
+                value: value.clone(),
                 previous_value,
             };
-            Json(serde_json::to_value(response).unwrap())
+            serde_json::to_value(response).unwrap()
         }
         Err(e) => {
-            error!("Failed to set setting '{}': {}", request.key, e);
+            error!("Failed to set setting '{}': {}", key, e);
             let response = ErrorResponse {
                 success: false,
                 message: format!("Failed to set setting: {}", e),
             };
-            Json(serde_json::to_value(response).unwrap())
+            serde_json::to_value(response).unwrap()
         }
     }
 }
 
+/// Run several get and set operations in a single request
+/// 
+/// Operations are executed in order, so a get sees the result of an earlier set
+/// of the same key. Each result has the same format as the response of the
+/// corresponding single-operation endpoint.
+#[post("/batch", data = "<request>")]
+pub fn settings_batch(request: Json<SettingsBatchRequest>) -> Json<SettingsBatchResponse> {
+    debug!("Running {} settings operations", request.operations.len());
+    
+    let results: Vec<serde_json::Value> = request.operations.iter()
+        .map(|operation| match operation {
+            SettingOperation::Get { key } => get_setting_value(key),
+            SettingOperation::Set { key, value } => set_setting_value(key, value),
+        })
+        .collect();
+    
+    let success = results.iter().all(|result| result["success"] == true);
+    Json(SettingsBatchResponse { success, results })
+}
+
 #[cfg(test)]
 mod tests {
     use super::*;
@@ -224,6 +275,28 @@ mod tests {
         assert!(deserialized.success);
     }
 
+    #[test]
+    fn test_settings_batch_request_deserialization() {
+        let json_str = r#"{"operations": [
+            {"op": "set", "key": "test_key", "value": {"count": 1}},
+            {"op": "get", "key": "test_key"}
+        ]}"#;
+        
+        let request: SettingsBatchRequest = serde_json::from_str(json_str).unwrap();
+        assert_eq!(request.operations.len(), 2);
+        match &request.operations[0] {
+            SettingOperation::Set { key, value } => {
+                assert_eq!(key, "test_key");
+                assert_eq!(value, &json!({"count": 1}));
+            }
+            _ => panic!("Expected a set operation"),
+        }
+        match &request.operations[1] {
+            SettingOperation::Get { key } => assert_eq!(key, "test_key"),
+            _ => panic!("Expected a get operation"),
+        }
+    }
+
     #[test]
     fn test_error_response_serialization() {
         let response = ErrorResponse {
@@ -15,6 +15,12 @@ pub struct PlayerEventResponse {
     pub message: String,
 }
 
+/// Request body for submitting several player events in one request
+#[derive(serde::Deserialize)]
+pub struct PlayerEventBatch {
+    pub events: Vec<Value>,
+}
+
 /// Generic API endpoint to receive player events via API
 #[post("/player/<player_name>/update", data = "<event_data>")]
 pub fn player_event_update(
@@ -80,4 +86,112 @@ pub fn player_event_update(
             })
         ))
     }
-}
\ No newline at end of file
+}
+
+/// API endpoint to receive several player events in a single request
+///
+/// Events are processed in order, processing stops at the first event that fails.
+#[post("/player/<player_name>/events/batch", data = "<batch>")]
+pub fn player_events_batch(
+    player_name: String,
+    batch: Json<PlayerEventBatch>,
+    controller: &State<Arc<AudioController>>
+) -> Result<Json<PlayerEventResponse>, Custom<Json<PlayerEventResponse>>> {
+    debug!("Received {} events via API for player: {}", batch.events.len(), player_name);
+    
+    // Find the player by name
+    let player_controller_arc = match controller.get_player_by_name(&player_name) {
+        Some(player_controller_arc) => player_controller_arc,
+        None => {
+            warn!("Player '{}' not found", player_name);
+            return Err(Custom(
+                Status::NotFound,
+                Json(PlayerEventResponse {
+                    success: false,
+                    message: format!("Player '{}' not found", player_name),
+                })
+            ));
+        }
+    };
+    
+    // Get a read lock on the player controller
+    let player_controller = match player_controller_arc.read() {
+        Ok(player_controller) => player_controller,
+        Err(_) => {
+            error!("Failed to acquire read lock on player controller: {}", player_name);
+            return Err(Custom(
+                Status::InternalServerError,
+                Json(PlayerEventResponse {
+                    success: false,
+                    message: "Internal error: could not access player controller".to_string(),
+                })
+            ));
+        }
+    };
+    
+    // Check if the player supports API events
+    if !player_controller.supports_api_events() {
+        warn!("Player '{}' does not support API event processing", player_name);
+        return Err(Custom(
+            Status::BadRequest,
+            Json(PlayerEventResponse {
+                success: false,
+                message: format!("Player '{}' does not support API event processing", player_name),
+            })
+        ));
+    }
+    
+    // Process the events in order
+    for (index, event_data) in batch.events.iter().enumerate() {
+        if !player_controller.process_api_event(event_data) {
+            warn!("Failed to process API event {} of batch for player: {}", index, player_name);
+            return Err(Custom(
+                Status::BadRequest,
+                Json(PlayerEventResponse {
+                    success: false,
+                    message: format!("Failed to process event {} of {} or processor disabled", index + 1, batch.events.len()),
+                })
+            ));
+        }
+    }
+    
+    debug!("Successfully processed {} API events for player: {}", batch.events.len(), player_name);
+    Ok(Json(PlayerEventResponse {
+        success: true,
+        message: format!("{} events processed successfully", batch.events.len()),
+    }))
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use serde_json::json;
+
+    #[test]
+    fn test_player_event_batch_deserialization() {
+        let batch: PlayerEventBatch = serde_json::from_value(json!({
+            "events": [
+                {"type": "state_changed", "state": "playing"},
+                {"type": "position_changed", "position": 30.0}
+            ]
+        })).unwrap();
+
+        assert_eq!(batch.events.len(), 2);
+        assert_eq!(batch.events[0]["type"], "state_changed");
+        assert_eq!(batch.events[0]["state"], "playing");
+        assert_eq!(batch.events[1]["position"], 30.0);
+    }
+
+    #[test]
+    fn test_player_event_batch_empty_events() {
+        let batch: PlayerEventBatch = serde_json::from_value(json!({"events": []})).unwrap();
+        assert!(batch.events.is_empty());
+    }
+
+    #[test]
+    fn test_player_event_batch_invalid() {
+        // The events have to be a list
+        assert!(serde_json::from_value::<PlayerEventBatch>(json!({})).is_err());
+        assert!(serde_json::from_value::<PlayerEventBatch>(json!({"events": {"type": "state_changed"}})).is_err());
+    }
+}
@@ -29,5 +29,5 @@ pub use generic::GenericPlayerController;
 #[cfg(not(windows))]
 pub use mpris::MprisPlayerController;
 // Export the event API components
-pub use event_api::{PlayerEventResponse, player_event_update};
+pub use event_api::{PlayerEventResponse, PlayerEventBatch, player_event_update, player_events_batch};
 